@@ -15,25 +15,44 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, status
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, status, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import sqlite3
-from typing import List, Optional, Dict
+from typing import Any, Callable, List, Optional, Dict, NamedTuple, Tuple
 from pathlib import Path
 import re
 import shutil
 from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from collections import defaultdict
+from itertools import groupby, islice, product
 import os
 import json
+import hashlib
+import traceback
+import threading
+import queue
+import logging
 from dotenv import load_dotenv
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 import tempfile
 
+# orjson (conditional import - schnellerer JSON-Parser, Fallback auf stdlib json)
+try:
+    import orjson
+    json_loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    json_loads = json.loads
+    ORJSON_AVAILABLE = False
+
 # Azure Blob Storage (conditional import - funktioniert lokal ohne Installation)
 try:
     from azure.storage.blob import BlobServiceClient
@@ -41,6 +60,9 @@ try:
 except ImportError:
     AZURE_AVAILABLE = False
 
+# Logger (Debug-Ausgaben nur bei aktiviertem DEBUG-Level, Formatierung lazy)
+logger = logging.getLogger(__name__)
+
 # Load Environment Variables
 load_dotenv(Path(__file__).parent.parent / ".env")
 
@@ -63,6 +85,8 @@ from excel_export import export_family_to_excel
 # Nutze Umgebungsvariablen falls gesetzt (für Electron), sonst Default
 UPLOADS_DIR = Path(os.getenv("UPLOADS_DIR", Path(__file__).parent / "uploads"))
 UPLOADS_DIR.mkdir(exist_ok=True, parents=True)
+# Puffergröße beim Speichern von Uploads (Default von copyfileobj: 64 KB)
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
 
 DB_PATH = Path(os.getenv("DB_PATH", Path(__file__).parent / "variantenbaum.db"))
 print(f"[CONFIG] Using DB: {DB_PATH}")
@@ -101,7 +125,7 @@ def filter_existing_pictures(pictures_json: str, uploads_dir: Path) -> List[dict
         if not pictures_json or pictures_json == '[]' or pictures_json == 'null':
             return []
             
-        pictures = json.loads(pictures_json) if isinstance(pictures_json, str) else pictures_json
+        pictures = json_loads(pictures_json) if isinstance(pictures_json, str) else pictures_json
         
         # Handle wenn pictures kein Array ist
         if not isinstance(pictures, list):
@@ -151,7 +175,7 @@ def parse_links(links_json: str) -> List[dict]:
         if not links_json or links_json == '[]' or links_json == 'null':
             return []
             
-        links = json.loads(links_json) if isinstance(links_json, str) else links_json
+        links = json_loads(links_json) if isinstance(links_json, str) else links_json
         
         # Handle wenn links kein Array ist
         if not isinstance(links, list):
@@ -207,14 +231,22 @@ def split_typecode(code: str):
     if not code_str:
         return []
     
-    # Erweiterte Trennzeichen-Pattern:
-    # 1. Mehrere aufeinanderfolgende Underscores
-    # 2. Normale Trennzeichen (Bindestrich, Leerzeichen)
-    # 3. Einzelne Underscores zwischen alphanumerischen Zeichen
-    delimiter_pattern = r'_{2,}|[-\s]+|(?<=\w)_(?=\w)'
-    
+    # Liste kopieren, damit Aufrufer den gecachten Tupel nicht verändern
+    return list(_split_typecode_cached(code_str))
+
+
+# Erweiterte Trennzeichen-Pattern:
+# 1. Mehrere aufeinanderfolgende Underscores
+# 2. Normale Trennzeichen (Bindestrich, Leerzeichen)
+# 3. Einzelne Underscores zwischen alphanumerischen Zeichen
+_TYPECODE_DELIMITER_RE = re.compile(r'_{2,}|[-\s]+|(?<=\w)_(?=\w)')
+
+
+@lru_cache(maxsize=4096)
+def _split_typecode_cached(code_str: str) -> tuple:
+    """Gecachter Kern von split_typecode (gleiche Codes wiederholen sich ständig)."""
     # Teile auf Basis der Trennzeichen
-    parts = re.split(delimiter_pattern, code_str)
+    parts = _TYPECODE_DELIMITER_RE.split(code_str)
     
     # Normalisiere alle Teile und filtere leere
     normalized_parts = []
@@ -223,7 +255,7 @@ def split_typecode(code: str):
         if normalized:
             normalized_parts.append(normalized)
     
-    return normalized_parts
+    return tuple(normalized_parts)
 
 
 def reconstruct_typecode(parts: list) -> str:
@@ -493,6 +525,7 @@ class BulkFilterRequest(BaseModel):
     parent_level_patterns: Optional[dict] = None  # {level: {"length": "3" | "2-4", "type": "alphabetic|numeric|alphanumeric|"}} z.B. {2: {"length": "3", "type": "numeric"}}
     parent_level_options: Optional[dict] = None  # {level: [option1, option2, ...]} z.B. {2: ["ABC", "DEF"]} - Nur noch für exakte Codes!
     allowed_pattern: Optional[dict] = None  # {"from": int, "to": int|None, "allowed": "alphabetic|numeric|alphanumeric"}
+    strict: bool = False  # True = nur kompatible Nodes liefern (Code-Filter laufen dann in SQL)
 
 class BulkFilterResponse(BaseModel):
     """Response mit gefilterten Nodes"""
@@ -576,13 +609,268 @@ class ConstraintValidationResult(BaseModel):
 # Helper Functions
 # ============================================================
 
-def get_db():
-    """Erstellt DB-Verbindung mit Row Factory"""
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
+# Verbindungs-PRAGMAs (gelten nur pro Connection, daher beim Öffnen jeder Connection).
+# journal_mode=WAL ist persistent und wird einmalig in startup_event gesetzt.
+# synchronous=NORMAL ist unter WAL crash-sicher; nur fsync beim Checkpoint.
+DB_CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",      # Andere Prozesse (Import-Skripte): warten statt "database is locked"
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",      # 64 MB Page-Cache
+    "PRAGMA temp_store=MEMORY",      # TEMP Tables (tmp_anc/tmp_desc) im RAM
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped I/O
+)
+
+
+# SQLite erlaubt nur einen Schreiber: schreibende Endpoints (Admin-Löschungen,
+# Bulk-Update, Node-Update, Deep Copy) werden im Prozess serialisiert, statt im
+# Threadpool gegenseitig auf SQLITE_BUSY zu laufen.
+# Lesende Endpoints (Previews, Bulk-Filter) laufen dank WAL weiter parallel.
+DB_WRITE_LOCK = threading.Lock()
+
+# Prepared Statements pro Connection (Default 128); konstante SQL-Strings auf
+# Modulebene werden so nur einmal geparst/geplant. api.py hat einige hundert
+# verschiedene Statements, daher großzügig bemessen
+DB_CACHED_STATEMENTS = 512
+
+
+# Connection-Pool: geöffnete Connections (inkl. PRAGMAs und Statement-Cache)
+# werden wiederverwendet statt pro Request neu geöffnet
+DB_POOL_SIZE = 8
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3-Connection, die bei close() in den Pool zurückgeht.
+    
+    Offene Transaktionen werden dabei zurückgerollt (wie beim echten close()).
+    Mehrfaches close() ist harmlos; ist der Pool voll, wird wirklich geschlossen.
+    """
+    checked_out = False
+    
+    def close(self):
+        if not self.checked_out:
+            return
+        self.checked_out = False
+        try:
+            if self.in_transaction:
+                self.rollback()
+            _db_pool.put_nowait(self)
+        except (queue.Full, sqlite3.Error):
+            super().close()
+
+
+def get_db(row_factory=sqlite3.Row):
+    """
+    Liefert eine DB-Verbindung aus dem Pool (oder öffnet eine neue mit den Connection-PRAGMAs).
+    
+    row_factory=None liefert Tupel-Rows (für Endpoints, die per Index lesen).
+    conn.close() gibt die Verbindung an den Pool zurück.
+    """
+    try:
+        conn = _db_pool.get_nowait()
+    except queue.Empty:
+        conn = sqlite3.connect(
+            str(DB_PATH),
+            cached_statements=DB_CACHED_STATEMENTS,
+            check_same_thread=False,  # Pool: Connection wandert zwischen Threadpool-Threads
+            factory=PooledConnection
+        )
+        for pragma in DB_CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+    conn.row_factory = row_factory
+    conn.checked_out = True
     return conn
 
 
+def close_db_pool():
+    """Schließt alle Connections im Pool (beim Shutdown)"""
+    while True:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            break
+        sqlite3.Connection.close(conn)
+
+
+# Schreibzugriffe anderer Connections erkennen (Pool-Connections, aber auch
+# Import-Skripte in anderen Prozessen, z.B. import_data.py --recreate):
+# PRAGMA data_version auf einer eigenen Connection ändert sich bei jedem
+# Commit einer anderen Connection. Ändert er sich, werden alle DB-Caches verworfen.
+_data_version_conn: Optional[sqlite3.Connection] = None
+_data_version_lock = threading.Lock()
+_data_version_last: Optional[int] = None
+_data_generation = 0
+_db_caches = []
+
+
+def check_data_version() -> int:
+    """
+    Liefert die aktuelle Daten-Generation des Prozesses.
+    
+    Hat seit dem letzten Aufruf irgendeine andere Connection committet, werden
+    alle @db_cache-Caches verworfen und die Generation hochgezählt.
+    """
+    global _data_version_conn, _data_version_last, _data_generation
+    
+    with _data_version_lock:
+        if _data_version_conn is None:
+            _data_version_conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+        version = _data_version_conn.execute("PRAGMA data_version").fetchone()[0]
+        
+        if version != _data_version_last:
+            for cached in _db_caches:
+                cached.cache_clear()
+            _data_version_last = version
+            _data_generation += 1
+        
+        return _data_generation
+
+
+def close_data_version_monitor():
+    """Schließt die data_version-Connection (beim Shutdown)"""
+    global _data_version_conn, _data_version_last
+    
+    with _data_version_lock:
+        if _data_version_conn is not None:
+            _data_version_conn.close()
+        _data_version_conn = None
+        _data_version_last = None
+
+
+def db_cache(maxsize: int):
+    """
+    lru_cache für Funktionen, deren Ergebnis vom DB-Inhalt abhängt.
+    
+    Vor jedem Aufruf wird check_data_version() geprüft, d.h. nach Commits
+    anderer Connections/Prozesse wird nie ein veralteter Eintrag geliefert.
+    """
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        _db_caches.append(cached)
+        
+        @wraps(func)
+        def wrapper(*args):
+            check_data_version()
+            return cached(*args)
+        
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+    
+    return decorator
+
+
+# Lese-Endpoints, deren Ergebnis nur durch Admin-Änderungen variiert
+HTTP_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+# Unterscheidet die Daten-Generationen verschiedener Server-Starts im ETag
+# (check_data_version zählt nach jedem Start wieder ab 1)
+HTTP_ETAG_EPOCH = os.urandom(4).hex()
+
+
+def dump_json_bytes(payload) -> bytes:
+    """
+    Serialisiert ein Response-Payload genau einmal zu JSON-Bytes.
+    
+    Pydantic-Modelle gehen über model_dump(mode='json') statt über den
+    jsonable_encoder-Baumdurchlauf; mit orjson (falls installiert) wird
+    zusätzlich der Encoder selbst deutlich schneller.
+    """
+    if isinstance(payload, BaseModel) and hasattr(payload, "model_dump"):
+        data = payload.model_dump(mode="json")
+    else:
+        data = jsonable_encoder(payload)
+    
+    return encode_json_bytes(data)
+
+
+def encode_json_bytes(data) -> bytes:
+    """Kodiert bereits JSON-kompatible Daten (dict/list/str/int/...) zu Bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def with_http_cache(http_request: Request, load_payload: Callable[[], Any]) -> Response:
+    """
+    Liefert ein Lese-Ergebnis mit ETag + Cache-Control aus.
+    
+    Der ETag hat die Form "<Daten-Version>.<Inhalts-Hash>". Die Daten-Version
+    (check_data_version + Request-Pfad inkl. Query) ändert sich bei jedem Commit
+    irgendeiner Connection, auch aus anderen Prozessen. Passt sie zum
+    If-None-Match des Clients, kommt sofort ein 304 Not Modified, ohne dass
+    load_payload() (und damit SQLite) aufgerufen wird.
+    
+    Nur wenn neu geladen werden muss, wird zusätzlich der Inhalts-Hash
+    verglichen (z.B. nach Commits, die dieses Ergebnis nicht betreffen).
+    """
+    version_key = f"{HTTP_ETAG_EPOCH}:{check_data_version()}:{http_request.url.path}?{http_request.url.query}"
+    version_tag = hashlib.blake2b(version_key.encode("utf-8"), digest_size=8).hexdigest()
+    
+    if_none_match = http_request.headers.get("if-none-match", "")
+    client_etags = [
+        tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")
+    ]
+    if "*" in client_etags:
+        return Response(status_code=304, headers={"Cache-Control": HTTP_CACHE_CONTROL})
+    
+    client_tags = [tag.partition(".") for tag in client_etags if tag]
+    for client_version, _, client_content in client_tags:
+        if client_version == version_tag:
+            headers = {"ETag": f'"{client_version}.{client_content}"', "Cache-Control": HTTP_CACHE_CONTROL}
+            return Response(status_code=304, headers=headers)
+    
+    body = dump_json_bytes(load_payload())
+    content_tag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    headers = {"ETag": f'"{version_tag}.{content_tag}"', "Cache-Control": HTTP_CACHE_CONTROL}
+    
+    if any(client_content == content_tag for _, _, client_content in client_tags):
+        return Response(status_code=304, headers=headers)
+    
+    # Body ist bereits serialisiert → FastAPI muss nicht erneut encodieren
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Zeilen pro Block beim Streamen der Nachfolger-Liste (get_all_successors)
+SUCCESSOR_STREAM_CHUNK_SIZE = 500
+
+
+# Rangfolge der Nachfolger-Warnungen (critical zuerst); product_successors.severity_rank
+# ist eine Generated Column mit genau diesem Ausdruck (siehe schema.sql)
+SUCCESSOR_SEVERITY_RANK_SQL = "CASE warning_severity WHEN 'critical' THEN 1 WHEN 'warning' THEN 2 ELSE 3 END"
+
+# Pflege von nodes.family_code (Code der Root-Familie, denormalisiert);
+# identisch mit den Triggern in schema.sql, hier für bestehende DBs
+NODE_FAMILY_CODE_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_node_family_code
+    AFTER INSERT ON nodes
+    FOR EACH ROW
+    BEGIN
+        UPDATE nodes
+        SET family_code = CASE
+            WHEN NEW.parent_id IS NULL THEN NEW.code
+            ELSE (SELECT family_code FROM nodes WHERE id = NEW.parent_id)
+        END
+        WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_family_code_rename
+    AFTER UPDATE OF code ON nodes
+    FOR EACH ROW
+    WHEN NEW.parent_id IS NULL AND NEW.code IS NOT OLD.code
+    BEGIN
+        UPDATE nodes
+        SET family_code = NEW.code
+        WHERE id = NEW.id
+           OR id IN (SELECT descendant_id FROM node_paths WHERE ancestor_id = NEW.id);
+    END
+    """,
+)
+
+
 # ============================================================
 # Startup Event: Create Users Table & Initial Admin
 # ============================================================
@@ -592,6 +880,11 @@ async def startup_event():
     conn = get_db()
     cursor = conn.cursor()
     
+    # WAL-Modus (persistent in der DB-Datei): Leser blockieren nicht mehr
+    # hinter Schreibern, d.h. Decode-/Lese-Requests im Threadpool warten
+    # nicht auf laufende Admin-Transaktionen.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     # Users Table erstellen
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -609,6 +902,78 @@ async def startup_event():
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)")
     
+    # Aktive Nachfolger-Warnungen pro Source Node, bereits in ORDER-BY-Reihenfolge
+    # (get_node_successor / get_product_successor: LIMIT 1 ohne CASE pro Zeile);
+    # neue DBs bekommen Spalte und Indizes aus schema.sql
+    try:
+        successor_columns = {
+            row[1] for row in cursor.execute("PRAGMA table_xinfo(product_successors)")
+        }
+        if successor_columns and 'severity_rank' not in successor_columns:
+            # ALTER TABLE erlaubt nur VIRTUAL (nicht STORED) Generated Columns
+            cursor.execute(f"""
+                ALTER TABLE product_successors ADD COLUMN severity_rank INTEGER
+                GENERATED ALWAYS AS ({SUCCESSOR_SEVERITY_RANK_SQL}) VIRTUAL
+            """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_successors_active_source
+            ON product_successors(source_node_id, warning_severity DESC, created_at DESC)
+            WHERE show_warning = 1
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_successors_active_rank
+            ON product_successors(source_node_id, severity_rank, created_at DESC)
+            WHERE show_warning = 1
+        """)
+        # create_successor_bulk verlässt sich für Duplikate auf INSERT OR IGNORE
+        try:
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_successor
+                ON product_successors(source_node_id, target_node_id)
+                WHERE target_node_id IS NOT NULL
+            """)
+        except sqlite3.IntegrityError:
+            logger.warning("idx_unique_successor nicht angelegt: product_successors enthält doppelte Paare")
+    except sqlite3.OperationalError:
+        pass  # product_successors existiert in dieser DB (noch) nicht
+    
+    # Pfad-Lookups per descendant_id (+ depth) als reine Index-Scans
+    # (ancestor_id im Index, node_paths ist eine rowid-Tabelle);
+    # ersetzt den früheren idx_paths_descendant_depth ohne ancestor_id
+    try:
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_paths_descendant_cover
+            ON node_paths(descendant_id, depth, ancestor_id)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_paths_descendant_depth")
+    except sqlite3.OperationalError:
+        pass  # node_paths existiert in dieser DB (noch) nicht
+    
+    # Denormalisierter Familien-Code (get_all_successors ohne Closure-Table-Join);
+    # neue DBs bekommen Spalte, Index und Trigger aus schema.sql
+    try:
+        node_columns = {row[1] for row in cursor.execute("PRAGMA table_info(nodes)")}
+        if node_columns and 'family_code' not in node_columns:
+            cursor.execute("ALTER TABLE nodes ADD COLUMN family_code TEXT")
+            cursor.execute("""
+                UPDATE nodes
+                SET family_code = CASE
+                    WHEN parent_id IS NULL THEN code
+                    ELSE (
+                        SELECT family.code
+                        FROM node_paths p
+                        JOIN nodes family ON family.id = p.ancestor_id
+                        WHERE p.descendant_id = nodes.id AND family.parent_id IS NULL
+                    )
+                END
+            """)
+        if node_columns:
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_nodes_family_code ON nodes(family_code)")
+            for trigger_sql in NODE_FAMILY_CODE_TRIGGERS_SQL:
+                cursor.execute(trigger_sql)
+    except sqlite3.OperationalError:
+        pass  # nodes/node_paths existieren in dieser DB (noch) nicht
+    
     # Prüfe ob Admin existiert
     cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
     admin_count = cursor.fetchone()[0]
@@ -642,6 +1007,13 @@ async def startup_event():
     conn.close()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Schließt die gepoolten DB-Connections"""
+    close_db_pool()
+    close_data_version_monitor()
+
+
 # ============================================================
 # AUTH ENDPOINTS
 # ============================================================
@@ -913,7 +1285,7 @@ def list_users():
         """)
         
         users = []
-        for row in cursor.fetchall():
+        for row in cursor:
             users.append({
                 "id": row['id'],
                 "username": row['username'],
@@ -1040,7 +1412,6 @@ def get_product_families():
         return results
     except Exception as e:
         print(f"[ERROR] get_product_families failed: {e}")
-        import traceback
         traceback.print_exc()
         raise
     finally:
@@ -2114,7 +2485,7 @@ def advanced_search(
     - label: Suche in label/label_en
     - family: Filter nach Produktfamilie
     """
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = get_db(row_factory=None)
     cursor = conn.cursor()
     
     try:
@@ -2814,7 +3185,6 @@ def search_code_all_occurrences(code: str):
             return CodeSearchResult(exists=False, code=code, occurrences=[])
         
         # Gruppiere nach (family, level)
-        from collections import defaultdict
         grouped = defaultdict(lambda: {
             'names': set(),
             'labels_de': set(),
@@ -3005,20 +3375,9 @@ def decode_with_wildcards(parts: list, original_input: str, cursor) -> TypecodeD
                         links = parse_links(node['links'])
                         all_links.extend(links)
                 
-                # Dedupliziere Pictures und Links
-                seen_pic_urls = set()
-                unique_pictures = []
-                for pic in all_pictures:
-                    if pic['url'] not in seen_pic_urls:
-                        seen_pic_urls.add(pic['url'])
-                        unique_pictures.append(pic)
-                
-                seen_link_urls = set()
-                unique_links = []
-                for link in all_links:
-                    if link['url'] not in seen_link_urls:
-                        seen_link_urls.add(link['url'])
-                        unique_links.append(link)
+                # Dedupliziere Pictures und Links basierend auf URL
+                unique_pictures = list({pic['url']: pic for pic in all_pictures}.values())
+                unique_links = list({link['url']: link for link in all_links}.values())
                 
                 path_segments.append(CodePathSegment(
                     level=level_idx,
@@ -3057,11 +3416,84 @@ def decode_with_wildcards(parts: list, original_input: str, cursor) -> TypecodeD
     )
 
 
+# ============================================================
+# Familien-Cache (Level 0 Metadaten für Decode)
+# ============================================================
+
+class FamilyMeta(NamedTuple):
+    """Unveränderliche Metadaten einer Produktfamilie (bereits geparst)"""
+    id: int
+    code: str
+    name: Optional[str]
+    label: Optional[str]
+    label_en: Optional[str]
+    level: int
+    position: Optional[int]
+    group_name: Optional[str]
+    pictures: tuple  # gefilterte Bilder (nur existierende Dateien)
+    links: tuple
+
+
+@db_cache(maxsize=256)
+def get_family_meta(family_code: str) -> Optional[FamilyMeta]:
+    """
+    Lädt eine Produktfamilie inkl. geparster Pictures/Links.
+    
+    Familien ändern sich selten, werden aber bei jedem Decode gebraucht.
+    Schreibende Endpoints rufen invalidate_family_cache() auf; Änderungen
+    anderer Prozesse (Import-Skripte) erkennt db_cache über PRAGMA data_version.
+    """
+    conn = get_db()
+    try:
+        family = conn.execute("""
+            SELECT id, code, name, label, label_en, level, position, group_name, pictures, links
+            FROM nodes
+            WHERE code = ?
+              AND level = 0
+              AND code IS NOT NULL
+            LIMIT 1
+        """, (family_code,)).fetchone()
+    finally:
+        conn.close()
+    
+    if not family:
+        return None
+    
+    return FamilyMeta(
+        id=family['id'],
+        code=family['code'],
+        name=family['name'],
+        label=family['label'],
+        label_en=family['label_en'],
+        level=family['level'],
+        position=family['position'],
+        group_name=family['group_name'],
+        pictures=tuple(filter_existing_pictures(family['pictures'], UPLOADS_DIR)),
+        links=tuple(parse_links(family['links']))
+    )
+
+
+def invalidate_family_cache():
+    """Verwirft die Familien-Caches nach Schreibzugriffen auf nodes/segment_subsegments"""
+    get_family_meta.cache_clear()
+    _build_family_schema_visualization.cache_clear()
+
+
 # ============================================================
 # Decode Typecode - Typcode entschlüsseln
 # ============================================================
 @app.get("/api/nodes/decode/{code:path}", response_model=TypecodeDecodeResult)
-def decode_typecode(code: str):
+def decode_typecode(code: str, http_request: Request):
+    """
+    Entschlüsselt einen Typcode (siehe _decode_typecode).
+    
+    Antwort ist per ETag/Cache-Control cachebar; bei passendem
+    If-None-Match kommt ein 304 ohne Body (ohne Decode, siehe with_http_cache).
+    """
+    return with_http_cache(http_request, lambda: _decode_typecode(code))
+
+
+def _decode_typecode(code: str) -> TypecodeDecodeResult:
     """
     Entschlüsselt einen Typcode und zeigt alle Segmente mit Labels.
     Funktioniert sowohl für vollständige als auch für Teilcodes.
@@ -3134,10 +3566,8 @@ def decode_typecode(code: str):
                 final_label = node['label']
                 final_label_en = node['label_en']
                 final_name = node['name']
-                pictures_data = node['pictures'] if node['pictures'] else '[]'
-                pictures = filter_existing_pictures(pictures_data, UPLOADS_DIR)
-                links_data = node['links'] if node['links'] else '[]'
-                links = parse_links(links_data)
+                pictures = filter_existing_pictures(node['pictures'], UPLOADS_DIR)
+                links = parse_links(node['links'])
             else:
                 # Mehrere Nodes → sammle einzigartige Labels
                 labels = set()
@@ -3155,35 +3585,19 @@ def decode_typecode(code: str):
                         names.add(node['name'])
                     
                     # Sammle Pictures und Links
-                    node_pictures = filter_existing_pictures(node.get('pictures', '[]'), UPLOADS_DIR)
-                    all_pictures.extend(node_pictures)
-                    
-                    node_links = parse_links(node.get('links', '[]'))
-                    all_links.extend(node_links)
+                    # sqlite3.Row hat kein .get() - direkter Zugriff, Helper behandeln NULL
+                    all_pictures.extend(filter_existing_pictures(node['pictures'], UPLOADS_DIR))
+                    all_links.extend(parse_links(node['links']))
                 
                 # Kombiniere einzigartige Labels mit Trennzeichen
                 final_label = '\n---\n'.join(sorted(labels)) if labels else None
                 final_label_en = '\n---\n'.join(sorted(labels_en)) if labels_en else None
                 final_name = ', '.join(sorted(names)) if names else None
                 
-                # Dedupliziere Pictures basierend auf URL
-                seen_pic_urls = set()
-                unique_pictures = []
-                for pic in all_pictures:
-                    if pic['url'] not in seen_pic_urls:
-                        seen_pic_urls.add(pic['url'])
-                        unique_pictures.append(pic)
-                
-                # Dedupliziere Links basierend auf URL
-                seen_link_urls = set()
-                unique_links = []
-                for link in all_links:
-                    if link['url'] not in seen_link_urls:
-                        seen_link_urls.add(link['url'])
-                        unique_links.append(link)
-                
-                pictures = unique_pictures
-                links = unique_links
+                # Dedupliziere Pictures und Links basierend auf URL
+                # (dict behält Einfügereihenfolge, ein Hash pro Eintrag)
+                pictures = list({pic['url']: pic for pic in all_pictures}.values())
+                links = list({link['url']: link for link in all_links}.values())
             
             return TypecodeDecodeResult(
                 exists=True,
@@ -3222,17 +3636,8 @@ def decode_typecode(code: str):
         # Überprüfe ob exakter Pfad existiert
         first_part = parts[0]
         
-        # Finde Produktfamilie (Level 0)
-        cursor.execute("""
-            SELECT n.id, n.code, n.label, n.label_en, n.level, n.position, n.group_name, n.pictures, n.links
-            FROM nodes n
-            WHERE n.code = ? 
-              AND n.level = 0
-              AND n.code IS NOT NULL
-            LIMIT 1
-        """, (first_part,))
-        
-        family_node = cursor.fetchone()
+        # Finde Produktfamilie (Level 0) - aus dem Familien-Cache
+        family_node = get_family_meta(first_part)
         
         if not family_node:
             return TypecodeDecodeResult(
@@ -3242,47 +3647,34 @@ def decode_typecode(code: str):
             )
         
         # Sammle alle Pfad-Segmente
-        # Hole name für Produktfamilie
-        cursor.execute("""
-            SELECT name FROM nodes WHERE id = ?
-        """, (family_node['id'],))
-        family_name_row = cursor.fetchone()
-        family_name = family_name_row['name'] if family_name_row else None
-        
-        # Parse pictures für Familie und filtere nicht existierende Dateien
-        family_pictures_data = family_node['pictures'] if family_node['pictures'] else '[]'
-        family_pictures = filter_existing_pictures(family_pictures_data, UPLOADS_DIR)
-        
-        # Parse links für Familie
-        family_links_data = family_node['links'] if family_node['links'] else '[]'
-        family_links = parse_links(family_links_data)
-        
         path_segments = [
             CodePathSegment(
-                level=family_node['level'],
-                code=family_node['code'],
-                name=family_name,
-                label=family_node['label'],
-                label_en=family_node['label_en'],
+                level=family_node.level,
+                code=family_node.code,
+                name=family_node.name,
+                label=family_node.label,
+                label_en=family_node.label_en,
                 position_start=1,
-                position_end=1 + len(family_node['code']),
-                pictures=family_pictures,
-                links=family_links
+                position_end=1 + len(family_node.code),
+                pictures=list(family_node.pictures),
+                links=list(family_node.links)
             )
         ]
         
-        current_node_id = family_node['id']
-        current_position = len(family_node['code']) + 2  # +1 für Leerzeichen
+        current_node_id = family_node.id
+        current_position = len(family_node.code) + 2  # +1 für Leerzeichen
         
         # Sammle group_name während des Pfad-Durchlaufs (erstes nicht-NULL group_name)
         # Starte mit family_node falls es schon ein group_name hat
-        collected_group_name = family_node['group_name'] if family_node['group_name'] else None
+        collected_group_name = family_node.group_name if family_node.group_name else None
         
         # Durchlaufe alle weiteren Teile des Pfads
         path_exists = True
         for i, part in enumerate(parts[1:], start=1):
+            # Kein DISTINCT: LIMIT 1 liefert ohnehin nur eine Zeile.
+            # node_paths statt parent_id, da Pattern-Container dazwischen liegen können.
             cursor.execute("""
-                SELECT DISTINCT n.id, n.code, n.name, n.label, n.label_en, n.level, n.position, n.full_typecode, n.group_name, n.pictures, n.links
+                SELECT n.id, n.code, n.name, n.label, n.label_en, n.level, n.position, n.full_typecode, n.group_name, n.pictures, n.links
                 FROM nodes n
                 INNER JOIN node_paths p ON n.id = p.descendant_id
                 WHERE p.ancestor_id = ?
@@ -3302,12 +3694,10 @@ def decode_typecode(code: str):
                 collected_group_name = next_node['group_name']
             
             # Parse pictures und filtere nicht existierende Dateien
-            pictures_data = next_node['pictures'] if next_node['pictures'] else '[]'
-            pictures = filter_existing_pictures(pictures_data, UPLOADS_DIR)
+            pictures = filter_existing_pictures(next_node['pictures'], UPLOADS_DIR)
             
             # Parse links
-            links_data = next_node['links'] if next_node['links'] else '[]'
-            links = parse_links(links_data)
+            links = parse_links(next_node['links'])
             
             # Position berechnen
             part_start = current_position
@@ -3354,7 +3744,7 @@ def decode_typecode(code: str):
             product_type=product_type,
             path_segments=path_segments,
             full_typecode=final_node['full_typecode'],
-            families=[family_node['code']],
+            families=[family_node.code],
             group_name=group_name
         )
         
@@ -3380,9 +3770,20 @@ class KMATReferenceResponse(BaseModel):
     kmat_reference: str
     message: str
 
+def canonical_path_json(path_node_ids: List[int]) -> str:
+    """
+    Kanonische JSON-Form für kmat_references.path_node_ids.
+    
+    Writer und Reader müssen exakt denselben String erzeugen, sonst verfehlt
+    der Vergleich auf dem UNIQUE(family_id, path_node_ids) Index den Eintrag
+    (z.B. Frontend sendet "[1,5]", json.dumps erzeugt "[1, 5]").
+    """
+    return json.dumps([int(node_id) for node_id in path_node_ids])
+
 @app.post("/api/admin/kmat-references", dependencies=[Depends(require_admin)])
 def create_or_update_kmat_reference(
     request: KMATReferenceRequest,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> KMATReferenceResponse:
     """
@@ -3390,50 +3791,51 @@ def create_or_update_kmat_reference(
     Die KMAT Referenz ist spezifisch für einen vollständigen Pfad durch den Baum.
     Nur für Admins verfügbar.
     """
+    # Admin-Änderung: Antwort nie cachen
+    response.headers["Cache-Control"] = "no-store"
+    
     conn = get_db()
     cursor = conn.cursor()
     
     try:
-        # Konvertiere path_node_ids zu JSON string
-        path_json = json.dumps(request.path_node_ids)
+        # Konvertiere path_node_ids zu kanonischem JSON string
+        path_json = canonical_path_json(request.path_node_ids)
         
-        # Prüfe ob bereits eine Referenz für diesen Pfad existiert
+        # Insert ohne vorheriges SELECT: der UNIQUE(family_id, path_node_ids)
+        # Index erkennt einen bestehenden Pfad atomar (kein Read-before-Write)
         cursor.execute("""
-            SELECT id FROM kmat_references
-            WHERE family_id = ? AND path_node_ids = ?
-        """, (request.family_id, path_json))
+            INSERT INTO kmat_references (
+                family_id, path_node_ids, full_typecode, 
+                kmat_reference, created_by
+            ) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(family_id, path_node_ids) DO NOTHING
+            RETURNING id
+        """, (
+            request.family_id,
+            path_json,
+            request.full_typecode,
+            request.kmat_reference,
+            current_user.user_id
+        ))
         
-        existing = cursor.fetchone()
+        inserted = cursor.fetchone()
         
-        if existing:
-            # Update existing
+        if inserted:
+            kmat_id = inserted[0]
+            message = "KMAT Referenz erstellt"
+        else:
+            # Pfad existiert bereits → Update über denselben Index
             cursor.execute("""
                 UPDATE kmat_references
                 SET kmat_reference = ?,
                     full_typecode = ?,
                     updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (request.kmat_reference, request.full_typecode, existing[0]))
+                WHERE family_id = ? AND path_node_ids = ?
+                RETURNING id
+            """, (request.kmat_reference, request.full_typecode, request.family_id, path_json))
             
-            kmat_id = existing[0]
+            kmat_id = cursor.fetchone()[0]
             message = "KMAT Referenz aktualisiert"
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO kmat_references (
-                    family_id, path_node_ids, full_typecode, 
-                    kmat_reference, created_by
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
-                request.family_id,
-                path_json,
-                request.full_typecode,
-                request.kmat_reference,
-                current_user.user_id
-            ))
-            
-            kmat_id = cursor.lastrowid
-            message = "KMAT Referenz erstellt"
         
         conn.commit()
         
@@ -3457,12 +3859,29 @@ def create_or_update_kmat_reference(
 @app.get("/api/kmat-references")
 def get_kmat_reference(
     family_id: int,
-    path_node_ids: str  # JSON string: "[1,5,12,45]"
+    path_node_ids: str,  # JSON string: "[1,5,12,45]"
+    http_request: Request
 ) -> dict:
     """
     Ruft die KMAT Referenz für ein konfiguriertes Produkt ab.
     Öffentlich verfügbar (alle User).
+    
+    Antwort ist per ETag/Cache-Control cachebar (siehe with_http_cache).
     """
+    # Normalisiere auf dieselbe Form wie beim Speichern (Whitespace-unabhängig)
+    try:
+        path_json = canonical_path_json(json.loads(path_node_ids))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="path_node_ids muss ein JSON-Array von Node IDs sein"
+        )
+    
+    return with_http_cache(http_request, lambda: _load_kmat_reference(family_id, path_json))
+
+
+def _load_kmat_reference(family_id: int, path_json: str) -> dict:
+    """Lädt die KMAT Referenz zu Familie + kanonischem Pfad (Payload für get_kmat_reference)"""
     conn = get_db()
     cursor = conn.cursor()
     
@@ -3472,12 +3891,12 @@ def get_kmat_reference(
                    created_at, updated_at
             FROM kmat_references
             WHERE family_id = ? AND path_node_ids = ?
-        """, (family_id, path_node_ids))
+        """, (family_id, path_json))
         
         result = cursor.fetchone()
         
         if result:
-            return {
+            payload = {
                 "found": True,
                 "id": result[0],
                 "kmat_reference": result[1],
@@ -3486,7 +3905,9 @@ def get_kmat_reference(
                 "updated_at": result[4]
             }
         else:
-            return {"found": False}
+            payload = {"found": False}
+        
+        return payload
             
     except Exception as e:
         raise HTTPException(
@@ -3500,12 +3921,16 @@ def get_kmat_reference(
 @app.delete("/api/admin/kmat-references/{kmat_id}", dependencies=[Depends(require_admin)])
 def delete_kmat_reference(
     kmat_id: int,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> dict:
     """
     Löscht eine KMAT Referenz.
     Nur für Admins verfügbar.
     """
+    # Admin-Änderung: Antwort nie cachen
+    response.headers["Cache-Control"] = "no-store"
+    
     conn = get_db()
     cursor = conn.cursor()
     
@@ -3581,6 +4006,7 @@ def create_node(request: CreateNodeRequest):
             """, (new_node_id, new_node_id))
         
         conn.commit()
+        invalidate_family_cache()
         
         return CreateNodeResponse(
             success=True,
@@ -3604,6 +4030,7 @@ def create_node(request: CreateNodeRequest):
 @app.post("/api/admin/families", dependencies=[Depends(require_admin)])
 def create_family(
     request: CreateFamilyRequest,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> CreateFamilyResponse:
     """
@@ -3615,6 +4042,9 @@ def create_family(
     
     Nur für Admins verfügbar.
     """
+    # Admin-Änderung: Antwort nie cachen
+    response.headers["Cache-Control"] = "no-store"
+    
     conn = get_db()
     cursor = conn.cursor()
     
@@ -3675,6 +4105,7 @@ def create_family(
         """, (family_id, family_id))
         
         conn.commit()
+        invalidate_family_cache()
         
         return CreateFamilyResponse(
             success=True,
@@ -3704,6 +4135,7 @@ def create_family(
 def update_family_labels(
     family_code: str,
     request: UpdateFamilyRequest,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> dict:
     """
@@ -3714,6 +4146,9 @@ def update_family_labels(
     
     Nur für Admins verfügbar.
     """
+    # Admin-Änderung: Antwort nie cachen
+    response.headers["Cache-Control"] = "no-store"
+    
     conn = get_db()
     cursor = conn.cursor()
     
@@ -3745,6 +4180,7 @@ def update_family_labels(
         ))
         
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -3766,12 +4202,104 @@ def update_family_labels(
         conn.close()
 
 
+# ============================================================
+# Lösch-Mengen (TEMP Tables für Delete + Delete-Preview)
+# ============================================================
+#
+# tmp_anc:  Wurzeln der Löschung
+# tmp_desc: Wurzeln + alle Descendants, einmal aus node_paths gelesen
+#
+# Ersetzt dynamische IN (?,?,...) Listen und wiederholte node_paths-Subqueries:
+# die Statements bleiben konstant (Statement-Cache), sind unabhängig von
+# SQLITE_MAX_VARIABLE_NUMBER und lesen node_paths genau einmal.
+# TEMP Tables sind pro Verbindung, also pro Request isoliert.
+
+# Delete-Preview: betroffene Nodes und Successors in EINER Abfrage
+PREVIEW_DELETION_COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM tmp_desc) AS total_nodes,
+        (SELECT COUNT(*) FROM product_successors
+         WHERE source_node_id IN (SELECT id FROM tmp_desc)
+            OR target_node_id IN (SELECT id FROM tmp_desc)) AS successor_count
+"""
+
+
+def _reset_deletion_tables(cursor):
+    """Legt tmp_anc/tmp_desc an (falls nötig) und leert sie"""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_anc(id INTEGER PRIMARY KEY)")
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_desc(id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM tmp_anc")
+    cursor.execute("DELETE FROM tmp_desc")
+
+
+def _fill_deletion_descendants(cursor) -> int:
+    """Materialisiert alle Descendants von tmp_anc in tmp_desc. Returns: Anzahl Nodes"""
+    cursor.execute("""
+        INSERT INTO tmp_desc (id)
+        SELECT DISTINCT descendant_id FROM node_paths
+        WHERE ancestor_id IN (SELECT id FROM tmp_anc)
+    """)
+    return cursor.rowcount
+
+
+def _delete_staged_nodes(cursor) -> int:
+    """
+    Löscht alle Nodes aus tmp_desc inkl. ihrer node_paths.
+    
+    tmp_desc ist unter "Descendant von" abgeschlossen: jeder Pfad mit einem
+    gelöschten Ancestor hat auch einen gelöschten Descendant. Daher reicht ein
+    DELETE über descendant_id (idx_paths_descendant) statt dass trg_node_delete
+    pro Node die Pfade einzeln sucht. Der Trigger bleibt als Absicherung und
+    findet danach nichts mehr.
+    
+    Returns:
+        Anzahl gelöschter Nodes
+    """
+    cursor.execute("DELETE FROM node_paths WHERE descendant_id IN (SELECT id FROM tmp_desc)")
+    cursor.execute("DELETE FROM nodes WHERE id IN (SELECT id FROM tmp_desc)")
+    return cursor.rowcount
+
+
+def _stage_code_level_deletion(cursor, code: str, level: int) -> int:
+    """
+    Lösch-Menge für "alle Nodes mit Code+Level" und ihre Descendants.
+    
+    Returns:
+        Anzahl der Nodes mit diesem Code+Level
+    """
+    _reset_deletion_tables(cursor)
+    
+    cursor.execute("""
+        INSERT INTO tmp_anc (id)
+        SELECT id FROM nodes
+        WHERE code = ? AND level = ?
+    """, (code, level))
+    same_code_count = cursor.rowcount
+    
+    _fill_deletion_descendants(cursor)
+    
+    return same_code_count
+
+
+def _stage_subtree_deletion(cursor, root_id: int) -> int:
+    """
+    Lösch-Menge für einen kompletten Subtree (z.B. Produktfamilie).
+    
+    Returns:
+        Anzahl betroffener Nodes (Root + alle Descendants)
+    """
+    _reset_deletion_tables(cursor)
+    cursor.execute("INSERT INTO tmp_anc (id) VALUES (?)", (root_id,))
+    return _fill_deletion_descendants(cursor)
+
+
 # ============================================================
 # Delete Product Family (Admin only)
 # ============================================================
 @app.delete("/api/admin/families/{family_code}", dependencies=[Depends(require_admin)])
 def delete_family(
     family_code: str,
+    response: Response,
     current_user: TokenData = Depends(get_current_user)
 ) -> dict:
     """
@@ -3782,14 +4310,21 @@ def delete_family(
     - Abhängigkeiten in product_successors
     - Abhängigkeiten in constraint_combinations
     
-    WICHTIG: Der trg_node_delete Trigger kümmert sich automatisch um node_paths!
+    WICHTIG: node_paths werden vorab in einem Statement gelöscht (trg_node_delete bleibt Absicherung)!
     
     Nur für Admins verfügbar.
     """
+    # Admin-Änderung: Antwort nie cachen
+    response.headers["Cache-Control"] = "no-store"
+    
     conn = get_db()
     cursor = conn.cursor()
+    DB_WRITE_LOCK.acquire()
     
     try:
+        # Gesamte Löschung in einer IMMEDIATE-Transaktion (Schreib-Lock sofort)
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # 1. Finde die Produktfamilie
         cursor.execute("""
             SELECT id, code 
@@ -3806,49 +4341,23 @@ def delete_family(
         
         family_id = family['id']
         
-        # 2. Zähle alle betroffenen Nodes (Family + alle Descendants)
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM node_paths
-            WHERE ancestor_id = ?
-        """, (family_id,))
-        total_nodes = cursor.fetchone()['count']
+        # 2. Family + alle Descendants einmal in tmp_desc materialisieren
+        _stage_subtree_deletion(cursor, family_id)
         
-        # 3. Prüfe product_successors Abhängigkeiten
+        # 3. Lösche product_successors Einträge (auch wenn CASCADE das macht, explizit ist besser)
+        #    Anzahl direkt aus rowcount statt separater COUNT-Abfrage
         cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM product_successors
-            WHERE source_node_id IN (
-                SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-            ) OR target_node_id IN (
-                SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-            )
-        """, (family_id, family_id))
-        successor_count = cursor.fetchone()['count']
-        
-        # 4. Lösche product_successors Einträge (auch wenn CASCADE das macht, explizit ist besser)
-        if successor_count > 0:
-            cursor.execute("""
-                DELETE FROM product_successors
-                WHERE source_node_id IN (
-                    SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-                ) OR target_node_id IN (
-                    SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-                )
-            """, (family_id, family_id))
+            DELETE FROM product_successors
+            WHERE source_node_id IN (SELECT id FROM tmp_desc)
+               OR target_node_id IN (SELECT id FROM tmp_desc)
+        """)
+        successor_count = cursor.rowcount
         
-        # 5. Lösche alle Nodes
+        # 4. Lösche alle Nodes (node_paths vorab in einem Statement)
         # CASCADE löscht automatisch: node_labels, node_dates
-        # Trigger trg_node_delete löscht: node_paths
-        cursor.execute("""
-            DELETE FROM nodes
-            WHERE id IN (
-                SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-            )
-        """, (family_id,))
-        
-        deleted_count = cursor.rowcount
+        deleted_count = _delete_staged_nodes(cursor)
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -3868,11 +4377,13 @@ def delete_family(
         )
     finally:
         conn.close()
+        DB_WRITE_LOCK.release()
 
 
 # ============================================================
 # Delete Single Node (Admin only)
 # ============================================================
+
 @app.delete("/api/admin/nodes/{node_id}", dependencies=[Depends(require_admin)])
 def delete_node(
     node_id: int,
@@ -3884,18 +4395,22 @@ def delete_node(
     Beispiel: Wenn Node "C010" auf Level 2 gelöscht wird, werden ALLE Nodes mit
     Code "C010" auf Level 2 gelöscht (da derselbe Code in verschiedenen Pfaden existieren kann).
     
-    Prüft vorher:
-    - Anzahl der betroffenen Nodes (alle Nodes mit diesem Code+Level + ihre Descendants)
-    - Abhängigkeiten in product_successors
+    Die Lösch-Menge wird einmal in tmp_desc materialisiert; Successors und Nodes
+    werden danach in einer IMMEDIATE-Transaktion gelöscht, die Anzahlen kommen
+    aus cursor.rowcount (keine separaten COUNT-Abfragen).
     
-    WICHTIG: Der trg_node_delete Trigger kümmert sich automatisch um node_paths!
+    WICHTIG: node_paths werden vorab in einem Statement gelöscht (trg_node_delete bleibt Absicherung)!
     
     Nur für Admins verfügbar.
     """
     conn = get_db()
     cursor = conn.cursor()
+    DB_WRITE_LOCK.acquire()
     
     try:
+        # Schreib-Lock sofort holen statt mitten in der Transaktion zu eskalieren
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # 1. Finde den Node
         cursor.execute("""
             SELECT id, code, label, level, parent_id
@@ -3921,63 +4436,28 @@ def delete_node(
         node_level = node['level']
         
         # 2. Finde ALLE Nodes mit demselben Code auf demselben Level
-        cursor.execute("""
-            SELECT id FROM nodes
-            WHERE code = ? AND level = ?
-        """, (node_code, node_level))
-        
-        all_node_ids = [row['id'] for row in cursor.fetchall()]
+        #    (landen in tmp_anc, ihre Descendants in tmp_desc)
+        same_code_count = _stage_code_level_deletion(cursor, node_code, node_level)
         
-        if not all_node_ids:
+        if not same_code_count:
             raise HTTPException(
                 status_code=404,
                 detail=f"Keine Nodes mit Code '{node_code}' auf Level {node_level} gefunden"
             )
         
-        # 3. Zähle alle betroffenen Nodes (alle Nodes mit diesem Code+Level + alle ihre Descendants)
-        placeholders = ','.join('?' * len(all_node_ids))
-        cursor.execute(f"""
-            SELECT COUNT(DISTINCT descendant_id) as count
-            FROM node_paths
-            WHERE ancestor_id IN ({placeholders})
-        """, all_node_ids)
-        total_nodes = cursor.fetchone()['count']
-        
-        # 4. Prüfe product_successors Abhängigkeiten
-        cursor.execute(f"""
-            SELECT COUNT(*) as count
-            FROM product_successors
-            WHERE source_node_id IN (
-                SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-            ) OR target_node_id IN (
-                SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-            )
-        """, all_node_ids + all_node_ids)
-        successor_count = cursor.fetchone()['count']
-        
-        # 5. Lösche product_successors Einträge
-        if successor_count > 0:
-            cursor.execute(f"""
-                DELETE FROM product_successors
-                WHERE source_node_id IN (
-                    SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-                ) OR target_node_id IN (
-                    SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-                )
-            """, all_node_ids + all_node_ids)
+        # 3. Lösche product_successors Einträge (Anzahl direkt aus rowcount)
+        cursor.execute("""
+            DELETE FROM product_successors
+            WHERE source_node_id IN (SELECT id FROM tmp_desc)
+               OR target_node_id IN (SELECT id FROM tmp_desc)
+        """)
+        successor_count = cursor.rowcount
         
-        # 6. Lösche alle Nodes
+        # 4. Lösche alle Nodes (node_paths vorab in einem Statement)
         # CASCADE löscht automatisch: node_labels, node_dates
-        # Trigger trg_node_delete löscht: node_paths
-        cursor.execute(f"""
-            DELETE FROM nodes
-            WHERE id IN (
-                SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-            )
-        """, all_node_ids)
-        
-        deleted_count = cursor.rowcount
+        deleted_count = _delete_staged_nodes(cursor)
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -3986,8 +4466,8 @@ def delete_node(
             "level": node_level,
             "deleted_nodes": deleted_count,
             "deleted_successors": successor_count,
-            "nodes_with_same_code": len(all_node_ids),
-            "message": f"Alle {len(all_node_ids)} Nodes mit Code '{node_code}' (Level {node_level}) und insgesamt {deleted_count} Nodes erfolgreich gelöscht"
+            "nodes_with_same_code": same_code_count,
+            "message": f"Alle {same_code_count} Nodes mit Code '{node_code}' (Level {node_level}) und insgesamt {deleted_count} Nodes erfolgreich gelöscht"
         }
         
     except HTTPException:
@@ -4000,6 +4480,7 @@ def delete_node(
         )
     finally:
         conn.close()
+        DB_WRITE_LOCK.release()
 
 
 # ============================================================
@@ -4052,52 +4533,32 @@ def preview_node_deletion(
         node_level = node['level']
         
         # Finde ALLE Nodes mit demselben Code auf demselben Level
-        cursor.execute("""
-            SELECT id FROM nodes
-            WHERE code = ? AND level = ?
-        """, (node_code, node_level))
-        
-        all_node_ids = [row['id'] for row in cursor.fetchall()]
+        same_code_count = _stage_code_level_deletion(cursor, node_code, node_level)
         
-        if not all_node_ids:
+        if not same_code_count:
             raise HTTPException(
                 status_code=404,
                 detail=f"Keine Nodes mit Code '{node_code}' auf Level {node_level} gefunden"
             )
         
-        # Zähle betroffene Nodes gesamt
-        placeholders = ','.join('?' * len(all_node_ids))
-        cursor.execute(f"""
-            SELECT COUNT(DISTINCT descendant_id) as count
-            FROM node_paths
-            WHERE ancestor_id IN ({placeholders})
-        """, all_node_ids)
-        total_nodes = cursor.fetchone()['count']
-        
-        # Zähle betroffene Successors
-        cursor.execute(f"""
-            SELECT COUNT(*) as count
-            FROM product_successors
-            WHERE source_node_id IN (
-                SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-            ) OR target_node_id IN (
-                SELECT DISTINCT descendant_id FROM node_paths WHERE ancestor_id IN ({placeholders})
-            )
-        """, all_node_ids + all_node_ids)
-        successor_count = cursor.fetchone()['count']
+        # Zähle betroffene Nodes gesamt und betroffene Successors
+        cursor.execute(PREVIEW_DELETION_COUNTS_SQL)
+        counts = cursor.fetchone()
+        total_nodes = counts['total_nodes']
+        successor_count = counts['successor_count']
         
         return {
             "node_id": node_id,
             "code": node_code,
             "label": node['label'],
             "level": node_level,
-            "nodes_with_same_code": len(all_node_ids),
+            "nodes_with_same_code": same_code_count,
             "affected_nodes": total_nodes,
             "affected_successors": successor_count,
             "affected_constraints": 0,
             "can_delete": True,
             "warnings": [
-                f"{len(all_node_ids)} Nodes mit Code '{node_code}' auf Level {node_level} werden gelöscht",
+                f"{same_code_count} Nodes mit Code '{node_code}' auf Level {node_level} werden gelöscht",
                 f"{total_nodes} Nodes gesamt (inkl. alle Descendants)",
                 f"{successor_count} Nachfolger-Beziehungen werden gelöscht" if successor_count > 0 else None,
             ]
@@ -4152,25 +4613,12 @@ def preview_family_deletion(
         
         family_id = family['id']
         
-        # Zähle betroffene Nodes
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM node_paths
-            WHERE ancestor_id = ?
-        """, (family_id,))
-        total_nodes = cursor.fetchone()['count']
-        
-        # Zähle betroffene Successors
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM product_successors
-            WHERE source_node_id IN (
-                SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-            ) OR target_node_id IN (
-                SELECT descendant_id FROM node_paths WHERE ancestor_id = ?
-            )
-        """, (family_id, family_id))
-        successor_count = cursor.fetchone()['count']
+        # Family + Descendants in tmp_desc, dann beide Zahlen in einer Abfrage
+        _stage_subtree_deletion(cursor, family_id)
+        cursor.execute(PREVIEW_DELETION_COUNTS_SQL)
+        counts = cursor.fetchone()
+        total_nodes = counts['total_nodes']
+        successor_count = counts['successor_count']
         
         return {
             "code": family['code'],
@@ -4199,6 +4647,36 @@ def preview_family_deletion(
 # ============================================================
 # Bulk Filter Nodes - Nodes nach Kriterien filtern
 # ============================================================
+# Zeichenklassen für die alphabetic/numeric/alphanumeric Patterns.
+# Ein re.search statt zwei any()-Schleifen pro Prüfung.
+_ALPHA_CHAR_RE = re.compile(r'[^\W\d_]')
+_DIGIT_CHAR_RE = re.compile(r'\d')
+_ALNUM_CHAR_RE = re.compile(r'[^\W_]')
+
+
+@lru_cache(maxsize=8192)
+def _matches_char_pattern(text: str, pattern: str, unknown_result: bool) -> bool:
+    """
+    Prüft einen Text gegen ein Zeichen-Pattern.
+    
+    WICHTIG: Sonderzeichen sind immer erlaubt!
+    Wir prüfen nur, dass MINDESTENS ein passendes Zeichen vorhanden ist:
+    - alphabetic:   mindestens ein Buchstabe, keine Zahlen
+    - numeric:      mindestens eine Zahl, keine Buchstaben
+    - alphanumeric: mindestens ein Buchstabe oder eine Zahl
+    
+    Gecacht, da dieselben Codes pro Bulk-Filter und über Requests hinweg
+    immer wieder geprüft werden.
+    """
+    if pattern == 'alphabetic':
+        return _ALPHA_CHAR_RE.search(text) is not None and _DIGIT_CHAR_RE.search(text) is None
+    elif pattern == 'numeric':
+        return _DIGIT_CHAR_RE.search(text) is not None and _ALPHA_CHAR_RE.search(text) is None
+    elif pattern == 'alphanumeric':
+        return _ALNUM_CHAR_RE.search(text) is not None
+    return unknown_result
+
+
 def check_allowed_pattern(code: str, allowed_config: dict) -> bool:
     """
     Prüft ob ein Code das allowed-pattern erfüllt.
@@ -4226,25 +4704,8 @@ def check_allowed_pattern(code: str, allowed_config: dict) -> bool:
     if not check_part:
         return False
     
-    # Prüfe gegen allowed-pattern
-    # WICHTIG: Sonderzeichen sind immer erlaubt!
-    # Wir prüfen nur, dass MINDESTENS ein passendes Zeichen vorhanden ist
-    if allowed == 'alphabetic':
-        # Enthält mindestens einen Buchstaben, keine Zahlen
-        has_alpha = any(c.isalpha() for c in check_part)
-        has_digit = any(c.isdigit() for c in check_part)
-        return has_alpha and not has_digit
-    elif allowed == 'numeric':
-        # Enthält mindestens eine Zahl, keine Buchstaben
-        has_alpha = any(c.isalpha() for c in check_part)
-        has_digit = any(c.isdigit() for c in check_part)
-        return has_digit and not has_alpha
-    elif allowed == 'alphanumeric':
-        # Enthält mindestens Buchstaben oder Zahlen
-        has_alnum = any(c.isalnum() for c in check_part)
-        return has_alnum
-    
-    return True
+    # Prüfe gegen allowed-pattern (unbekannte Patterns erlauben alles)
+    return _matches_char_pattern(check_part, allowed, True)
 
 
 def check_parent_level_option(parent_code: str, option_config) -> bool:
@@ -4265,28 +4726,133 @@ def check_parent_level_option(parent_code: str, option_config) -> bool:
     if isinstance(option_config, str):
         return parent_code == option_config
     
-    # Dict = Pattern-Match
+    # Dict = Pattern-Match (unbekannte Patterns matchen nicht)
     if isinstance(option_config, dict) and 'pattern' in option_config:
-        pattern = option_config['pattern']
-        # WICHTIG: Sonderzeichen sind immer erlaubt!
-        if pattern == 'alphabetic':
-            # Enthält mindestens einen Buchstaben, keine Zahlen
-            has_alpha = any(c.isalpha() for c in parent_code)
-            has_digit = any(c.isdigit() for c in parent_code)
-            return has_alpha and not has_digit
-        elif pattern == 'numeric':
-            # Enthält mindestens eine Zahl, keine Buchstaben
-            has_alpha = any(c.isalpha() for c in parent_code)
-            has_digit = any(c.isdigit() for c in parent_code)
-            return has_digit and not has_alpha
-        elif pattern == 'alphanumeric':
-            # Enthält mindestens Buchstaben oder Zahlen
-            has_alnum = any(c.isalnum() for c in parent_code)
-            return has_alnum
+        return _matches_char_pattern(parent_code, option_config['pattern'], False)
     
     return False
 
 
+def _parse_parent_pattern_spec(pattern_config) -> Optional[tuple]:
+    """
+    Normalisiert eine parent_level_patterns Angabe.
+    
+    Args:
+        pattern_config: int (alte API: exakte Länge) oder {"length": "3" | "2-4", "type": "..."}
+        
+    Returns:
+        (min_len, max_len, pattern_type) - min_len/max_len None = keine Längenprüfung,
+        oder None wenn die Länge ungültig ist (kein Parent-Code kann dann passen)
+    """
+    if not isinstance(pattern_config, dict):
+        # Rückwärtskompatibilität: int = exakte Länge
+        expected_len = int(pattern_config)
+        return (expected_len, expected_len, None)
+    
+    length_str = str(pattern_config.get('length', '') or '')
+    pattern_type = pattern_config.get('type', '') or None
+    
+    if not length_str:
+        return (None, None, pattern_type)
+    
+    try:
+        if '-' in length_str:
+            # Range: z.B. "2-4" (andere Formen wie "1-2-3" werden ignoriert)
+            parts = length_str.split('-')
+            if len(parts) != 2:
+                return (None, None, pattern_type)
+            return (int(parts[0]), int(parts[1]), pattern_type)
+        # Exakte Länge
+        expected_len = int(length_str)
+        return (expected_len, expected_len, pattern_type)
+    except ValueError:
+        return None
+
+
+def _split_parent_options(allowed_options) -> tuple:
+    """
+    Teilt parent_level_options in exakte Codes und Prefixe ("M1*" = startet mit "M1").
+    
+    Returns:
+        (frozenset exakter Codes, tuple von Prefixen für str.startswith)
+    """
+    exact_codes = frozenset(option for option in allowed_options if '*' not in option)
+    prefixes = tuple(option.replace('*', '') for option in allowed_options if '*' in option)
+    return exact_codes, prefixes
+
+
+def _parent_code_matches_spec(parent_code: Optional[str], spec: Optional[tuple]) -> bool:
+    """Prüft einen Parent-Code gegen eine normalisierte parent_level_patterns Angabe"""
+    if parent_code is None or spec is None:
+        return False
+    
+    min_len, max_len, pattern_type = spec
+    if min_len is not None and not (min_len <= len(parent_code) <= max_len):
+        return False
+    
+    # Prüfe Pattern-Type (wenn angegeben) - direkt gegen den gecachten Matcher,
+    # ohne pro Aufruf ein {'pattern': ...} dict für check_parent_level_option zu bauen
+    if pattern_type and not _matches_char_pattern(parent_code, pattern_type, False):
+        return False
+    
+    return True
+
+
+def _parent_code_matches_options(parent_code: Optional[str], exact_codes: frozenset, prefixes: tuple) -> bool:
+    """Prüft einen Parent-Code gegen normalisierte parent_level_options"""
+    if parent_code is None:
+        return False
+    return parent_code in exact_codes or parent_code.startswith(prefixes)
+
+
+# Bulk-Filter Basis-Query: alle Nodes auf dem Level in der Familie,
+# gruppiert nach Code um Duplikate zu vermeiden (Filter werden angehängt)
+BULK_FILTER_BASE_SQL = """
+    SELECT 
+        n.code,
+        MIN(n.id) as id,
+        GROUP_CONCAT(n.id) as all_ids_csv,
+        MIN(n.label) as label,
+        MIN(n.label_en) as label_en,
+        MIN(n.name) as name,
+        n.level,
+        MIN(n.position) as position,
+        MIN(n.group_name) as group_name,
+        MIN(n.pattern) as pattern,
+        -- Skalare Subquery (Rowid-Lookup) statt LEFT JOIN nodes parent
+        MIN((SELECT p.pattern FROM nodes p WHERE p.id = n.parent_id)) as parent_pattern
+    FROM nodes n
+    WHERE n.level = ?
+      AND n.code IS NOT NULL
+      AND EXISTS (
+          SELECT 1 FROM node_paths np
+          WHERE np.ancestor_id = ?
+            AND np.descendant_id = n.id
+      )
+"""
+
+# Bulk-Filter: alle Node-IDs pro Code, nur nötig wenn group_name/name die
+# Basis-Query einschränken (ids muss trotzdem ALLE Nodes mit dem Code enthalten)
+BULK_FILTER_ALL_IDS_SQL = """
+    SELECT n.code AS dcode, n.id AS did
+    FROM nodes n
+    JOIN node_paths np_fam ON np_fam.ancestor_id = ? AND np_fam.descendant_id = n.id
+    WHERE n.level = ?
+      AND n.code IS NOT NULL
+"""
+
+# Bulk-Filter Prefetch (nur bei Parent-Filtern): Parent-Codes je Level pro Node
+BULK_FILTER_PARENT_CODES_SQL = """
+    SELECT n.id AS did, p.level AS plevel, p.code AS pcode
+    FROM nodes n
+    JOIN node_paths np_fam ON np_fam.ancestor_id = ? AND np_fam.descendant_id = n.id
+    JOIN node_paths np_anc ON np_anc.descendant_id = n.id AND np_anc.depth > 0
+    JOIN nodes p ON p.id = np_anc.ancestor_id AND p.code IS NOT NULL
+    WHERE n.level = ?
+      AND n.code IS NOT NULL
+"""
+
+
 @app.post("/api/nodes/bulk-filter", response_model=BulkFilterResponse)
 def bulk_filter_nodes(request: BulkFilterRequest):
     """
@@ -4302,38 +4868,23 @@ def bulk_filter_nodes(request: BulkFilterRequest):
     - parent_level_patterns: {level: pattern_length} - Filtert nach Parent-Pattern auf bestimmten Levels
     - parent_level_options: {level: [codes]} - Filtert nach Parent-Code auf bestimmten Levels
     - allowed_pattern: {"from": int, "to": int, "allowed": str} - Filtert nach Code-Pattern (alphabetic/numeric/alphanumeric)
+    
+    strict=True: Inkompatible Nodes werden weggelassen statt markiert. code, code_prefix
+    und pattern werden dann direkt in SQL gefiltert (weniger Zeilen, weniger Python-Prüfungen).
     """
     conn = get_db()
     
     try:
+        # Familie einmal auflösen (gecacht), danach nur noch Integer-Vergleiche
+        family = get_family_meta(request.family_code)
+        if not family:
+            return BulkFilterResponse(nodes=[], count=0)
+        family_id = family.id
+        
         # Basis-Query: Hole alle Nodes auf dem Level in der Familie
-        # Gruppiere nach Code um Duplikate zu vermeiden
-        query = """
-            SELECT 
-                n.code,
-                MIN(n.id) as id,
-                MIN(n.label) as label,
-                MIN(n.label_en) as label_en,
-                MIN(n.name) as name,
-                n.level,
-                MIN(n.position) as position,
-                MIN(n.group_name) as group_name,
-                MIN(n.pattern) as pattern,
-                MIN(parent.pattern) as parent_pattern
-            FROM nodes n
-            LEFT JOIN nodes parent ON parent.id = n.parent_id
-            LEFT JOIN node_paths np ON np.descendant_id = n.id
-            WHERE n.level = ?
-              AND n.code IS NOT NULL
-              AND EXISTS (
-                  SELECT 1 FROM nodes fam
-                  WHERE fam.code = ?
-                    AND fam.level = 0
-                    AND np.ancestor_id = fam.id
-              )
-        """
+        query = BULK_FILTER_BASE_SQL
         
-        params = [request.level, request.family_code]
+        params = [request.level, family_id]
         
         # HINWEIS: Filter für aktuelles Level (code, code_prefix, pattern) werden
         # NICHT mehr in der SQL-Query angewendet, sondern später per is_compatible Flag,
@@ -4348,12 +4899,74 @@ def bulk_filter_nodes(request: BulkFilterRequest):
             query += " AND n.name LIKE ?"
             params.append(f"%{request.name}%")
         
+        # strict: Code-Filter des aktuellen Levels direkt in SQL (gilt auch für den Prefetch)
+        strict_sql = ""
+        strict_params = []
+        if request.strict:
+            if request.code:
+                strict_sql += " AND n.code = ?"
+                strict_params.append(request.code)
+            if request.code_prefix:
+                # substr statt LIKE: case-sensitive wie startswith, keine %/_ Wildcards
+                strict_sql += " AND substr(n.code, 1, ?) = ?"
+                strict_params.extend([len(request.code_prefix), request.code_prefix])
+            if request.pattern:
+                pattern_str = str(request.pattern)
+                try:
+                    if '-' in pattern_str:
+                        min_len, max_len = (int(p) for p in pattern_str.split('-'))
+                    else:
+                        min_len = max_len = int(pattern_str)
+                    strict_sql += " AND length(n.code) BETWEEN ? AND ?"
+                    strict_params.extend([min_len, max_len])
+                except ValueError:
+                    # Ungültiges Pattern: Python-Prüfung unten markiert alles als inkompatibel
+                    pass
+        
+        query += strict_sql
+        params.extend(strict_params)
         query += " GROUP BY n.code, n.level ORDER BY position, n.code"
         
-        results = conn.execute(query, params).fetchall()
+        # Heiße Schleife: rohe Tupel statt sqlite3.Row (keine Namens-Lookups pro Feld)
+        results_cursor = conn.cursor()
+        results_cursor.row_factory = None
+        results = results_cursor.execute(query, params).fetchall()
+        
+        # Prefetch statt N+1: Parent-Codes je Level für alle Nodes in EINER Query,
+        # nur wenn Parent-Filter aktiv sind (die Node-IDs pro Code liefert die Basis-Query)
+        parent_by_nodeid = defaultdict(dict)
+        if request.parent_level_patterns or request.parent_level_options:
+            prefetch_rows = conn.execute(
+                BULK_FILTER_PARENT_CODES_SQL + strict_sql + " ORDER BY n.id, p.level",
+                (family_id, request.level, *strict_params)
+            )
+            for r in prefetch_rows:
+                parent_by_nodeid[r['did']][r['plevel']] = r['pcode']
+        
+        # Node-IDs pro Code: normalerweise direkt aus GROUP_CONCAT der Basis-Query,
+        # nur bei group_name/name Filter separat (dort fehlen sonst nicht passende Nodes)
+        all_ids_by_code = None
+        if request.group_name or request.name:
+            all_ids_by_code = defaultdict(list)
+            for r in conn.execute(
+                BULK_FILTER_ALL_IDS_SQL + strict_sql + " ORDER BY n.id",
+                (family_id, request.level, *strict_params)
+            ):
+                all_ids_by_code[r['dcode']].append(r['did'])
+        
+        # Parent-Filter einmal pro Request normalisieren statt pro Node
+        parent_pattern_specs = [
+            (int(level), _parse_parent_pattern_spec(pattern_config))
+            for level, pattern_config in (request.parent_level_patterns or {}).items()
+        ]
+        parent_option_specs = [
+            (int(level), *_split_parent_options(allowed_options))
+            for level, allowed_options in (request.parent_level_options or {}).items()
+        ]
         
         nodes = []
-        for row in results:
+        for (code, first_id, all_ids_csv, label, label_en, name, level,
+             node_position, group_name, _pattern, parent_pattern) in results:
             # Starte mit kompatibel = True
             is_compatible = True
             
@@ -4361,11 +4974,11 @@ def bulk_filter_nodes(request: BulkFilterRequest):
             # Diese werden NICHT in der SQL-Query angewendet, damit auch inkompatible Optionen angezeigt werden!
             
             # Exakter Code-Filter
-            if request.code and row['code'] != request.code:
+            if request.code and code != request.code:
                 is_compatible = False
             
             # Code-Prefix Filter
-            if request.code_prefix and not row['code'].startswith(request.code_prefix):
+            if request.code_prefix and not code.startswith(request.code_prefix):
                 is_compatible = False
             
             # Pattern-Länge Filter (Code-Länge: exakt oder Range)
@@ -4378,7 +4991,7 @@ def bulk_filter_nodes(request: BulkFilterRequest):
                         try:
                             min_len = int(parts[0])
                             max_len = int(parts[1])
-                            if not (min_len <= len(row['code']) <= max_len):
+                            if not (min_len <= len(code) <= max_len):
                                 is_compatible = False
                         except ValueError:
                             is_compatible = False
@@ -4386,13 +4999,13 @@ def bulk_filter_nodes(request: BulkFilterRequest):
                     # Exakte Länge
                     try:
                         expected_len = int(pattern_str)
-                        if len(row['code']) != expected_len:
+                        if len(code) != expected_len:
                             is_compatible = False
                     except ValueError:
                         is_compatible = False
             
             # Code-Content Filter (nach DB-Abfrage, weil komplex)
-            if request.code_content and row['code']:
+            if request.code_content and code:
                 position = request.code_content.get('position')
                 value = request.code_content.get('value', '')
                 
@@ -4404,8 +5017,8 @@ def bulk_filter_nodes(request: BulkFilterRequest):
                     index = position - 1
                     
                     # Code muss ab dieser Position MIT dem Wert BEGINNEN (startswith)
-                    if index >= 0 and index < len(row['code']):
-                        code_from_index = row['code'][index:]
+                    if index >= 0 and index < len(code):
+                        code_from_index = code[index:]
                         if not code_from_index.startswith(value):
                             passes_filter = False
                     else:
@@ -4413,7 +5026,7 @@ def bulk_filter_nodes(request: BulkFilterRequest):
                         passes_filter = False
                 else:
                     # Keine Position: Suche im gesamten Code (substring-Suche)
-                    if value not in row['code']:
+                    if value not in code:
                         passes_filter = False
                 
                 if not passes_filter:
@@ -4421,156 +5034,62 @@ def bulk_filter_nodes(request: BulkFilterRequest):
             
             # Allowed-Pattern Filter (prüfe aktuellen Code)
             if request.allowed_pattern:
-                if not check_allowed_pattern(row['code'], request.allowed_pattern):
+                if not check_allowed_pattern(code, request.allowed_pattern):
                     is_compatible = False
             
-            # Hole ALLE Node-IDs mit diesem Code auf diesem Level in dieser Familie
+            # ALLE Node-IDs mit diesem Code auf diesem Level in dieser Familie
             # (Wird sowohl für Parent-Filter als auch für Bulk-Update benötigt)
-            all_ids_query = """
-                SELECT DISTINCT n.id
-                FROM nodes n
-                LEFT JOIN node_paths np ON np.descendant_id = n.id
-                WHERE n.code = ?
-                  AND n.level = ?
-                  AND EXISTS (
-                      SELECT 1 FROM nodes fam
-                      WHERE fam.code = ?
-                        AND fam.level = 0
-                        AND np.ancestor_id = fam.id
-                  )
-            """
-            all_ids_result = conn.execute(all_ids_query, (row['code'], request.level, request.family_code)).fetchall()
-            all_ids = [r['id'] for r in all_ids_result]
+            if all_ids_by_code is None:
+                all_ids = sorted(int(x) for x in all_ids_csv.split(','))
+            else:
+                all_ids = all_ids_by_code.get(code, [])
             
             # Parent-Level-Patterns und Parent-Level-Options Filter
             # WICHTIG: Es kann mehrere Nodes mit demselben Code geben!
             # Wir müssen prüfen ob MINDESTENS EINE Node die Parent-Filter erfüllt
             if request.parent_level_patterns or request.parent_level_options:
-                # Prüfe ob mindestens EINE dieser Nodes die Parent-Filter erfüllt
-                at_least_one_compatible = False
+                # Kandidaten pro Filter-Level einschränken; leer = keine Node erfüllt alle Filter
+                candidate_ids = all_ids
+                for level_int, spec in parent_pattern_specs:
+                    candidate_ids = [
+                        nid for nid in candidate_ids
+                        if _parent_code_matches_spec(parent_by_nodeid.get(nid, {}).get(level_int), spec)
+                    ]
+                    if not candidate_ids:
+                        break
                 
-                for node_id in all_ids:
-                    node_compatible = True
-                    
-                    # Hole Parent-Codes für diese spezifische Node
-                    parent_codes_query = """
-                        SELECT p.level, p.code
-                        FROM nodes n
-                        JOIN node_paths np ON np.descendant_id = n.id AND np.depth > 0
-                        JOIN nodes p ON p.id = np.ancestor_id
-                        WHERE n.id = ?
-                          AND p.code IS NOT NULL
-                        ORDER BY p.level
-                    """
-                    parent_results = conn.execute(parent_codes_query, (node_id,)).fetchall()
-                    parent_codes_by_level = {p['level']: p['code'] for p in parent_results}
-                    
-                    # Prüfe parent_level_patterns für diese Node
-                    if request.parent_level_patterns:
-                        for level, pattern_config in request.parent_level_patterns.items():
-                            level_int = int(level)
-                            parent_code = parent_codes_by_level.get(level_int)
-                            
-                            if parent_code is None:
-                                node_compatible = False
-                                break
-                            
-                            # pattern_config kann int (alte API) oder dict sein
-                            if isinstance(pattern_config, dict):
-                                length_str = pattern_config.get('length', '')
-                                pattern_type = pattern_config.get('type', '')
-                                
-                                # Prüfe Länge (exakt oder Range)
-                                if length_str:
-                                    if '-' in str(length_str):
-                                        # Range: z.B. "2-4"
-                                        parts = str(length_str).split('-')
-                                        if len(parts) == 2:
-                                            try:
-                                                min_len = int(parts[0])
-                                                max_len = int(parts[1])
-                                                if not (min_len <= len(parent_code) <= max_len):
-                                                    node_compatible = False
-                                                    break
-                                            except ValueError:
-                                                node_compatible = False
-                                                break
-                                    else:
-                                        # Exakte Länge
-                                        try:
-                                            expected_len = int(length_str)
-                                            if len(parent_code) != expected_len:
-                                                node_compatible = False
-                                                break
-                                        except ValueError:
-                                            node_compatible = False
-                                            break
-                                
-                                # Prüfe Pattern-Type (wenn angegeben)
-                                if pattern_type:
-                                    if not check_parent_level_option(parent_code, {'pattern': pattern_type}):
-                                        node_compatible = False
-                                        break
-                            else:
-                                # Rückwärtskompatibilität: int = exakte Länge
-                                expected_pattern = int(pattern_config)
-                                if len(parent_code) != expected_pattern:
-                                    node_compatible = False
-                                    break
-                    
-                    # Prüfe parent_level_options für diese Node (exakte Codes oder Prefix mit *)
-                    if node_compatible and request.parent_level_options:
-                        for level, allowed_options in request.parent_level_options.items():
-                            level_int = int(level)
-                            parent_code = parent_codes_by_level.get(level_int)
-                            
-                            if parent_code is None:
-                                node_compatible = False
-                                break
-                            
-                            # Prüfe ob parent_code mit einem der Patterns übereinstimmt
-                            matches_any = False
-                            for option in allowed_options:
-                                if '*' in option:
-                                    # Wildcard-Matching: "M1*" bedeutet startet mit "M1"
-                                    prefix = option.replace('*', '')
-                                    if parent_code.startswith(prefix):
-                                        matches_any = True
-                                        break
-                                else:
-                                    # Exakte Übereinstimmung
-                                    if parent_code == option:
-                                        matches_any = True
-                                        break
-                            
-                            if not matches_any:
-                                node_compatible = False
-                                break
-                    
-                    # Wenn diese Node kompatibel ist, haben wir mindestens eine gefunden
-                    if node_compatible:
-                        at_least_one_compatible = True
-                        break  # Wir brauchen nur EINE kompatible
+                # parent_level_options (exakte Codes oder Prefix mit *)
+                for level_int, exact_codes, prefixes in parent_option_specs:
+                    if not candidate_ids:
+                        break
+                    candidate_ids = [
+                        nid for nid in candidate_ids
+                        if _parent_code_matches_options(parent_by_nodeid.get(nid, {}).get(level_int), exact_codes, prefixes)
+                    ]
                 
                 # Setze is_compatible basierend auf Ergebnis
-                if not at_least_one_compatible:
+                if not candidate_ids:
                     is_compatible = False
             
-            nodes.append(AvailableOption(
-                id=row['id'],
+            if request.strict and not is_compatible:
+                continue
+            
+            # Werte stammen typisiert aus der DB: model_construct spart die Validierung pro Zeile
+            nodes.append(AvailableOption.model_construct(
+                id=first_id,
                 ids=all_ids,  # ALLE IDs mit diesem Code!
-                code=row['code'],
-                label=row['label'],
-                label_en=row['label_en'],
-                name=row['name'],
-                group_name=row['group_name'],
-                level=row['level'],
-                position=row['position'],
+                code=code,
+                label=label,
+                label_en=label_en,
+                name=name,
+                group_name=group_name,
+                level=level,
+                position=node_position,
                 is_compatible=is_compatible,  # Basierend auf erweiterten Filtern!
-                parent_pattern=row['parent_pattern']
+                parent_pattern=parent_pattern
             ))
         
-        return BulkFilterResponse(
+        return BulkFilterResponse.model_construct(
             nodes=nodes,
             count=len(nodes)
         )
@@ -4588,6 +5107,33 @@ def bulk_filter_nodes(request: BulkFilterRequest):
 # Bulk Update Nodes - Mehrere Nodes gleichzeitig aktualisieren
 # WICHTIG: Muss VOR /api/nodes/{node_id} stehen!
 # ============================================================
+
+# Whitespace, den str.strip() beim Anhängen entfernt (für SQL TRIM)
+BULK_APPEND_TRIM_CHARS = ' \t\n\r\x0b\x0c'
+
+
+@lru_cache(maxsize=256)
+def _bulk_update_sql(columns: Tuple[str, ...], append: bool, id_count: int) -> str:
+    """
+    UPDATE-Statement für bulk_update_nodes (gecacht pro Spalten-Kombination und ID-Anzahl).
+    
+    Gleicher SQL-Text => SQLite nutzt das Prepared Statement aus dem Connection-Cache.
+    Parameter pro Spalte: direkt (Wert) bzw. append (Separator, Wert, BULK_APPEND_TRIM_CHARS).
+    """
+    if append:
+        set_clause = ', '.join(
+            f"{column} = TRIM(COALESCE({column}, '') || ? || ?, ?)" for column in columns
+        )
+    else:
+        set_clause = ', '.join(f"{column} = ?" for column in columns)
+    placeholders = ','.join('?' * id_count)
+    return f"""
+                UPDATE nodes
+                SET {set_clause}
+                WHERE id IN ({placeholders})
+            """
+
+
 @app.put("/api/nodes/bulk-update", response_model=BulkUpdateResponse)
 def bulk_update_nodes(request: BulkUpdateRequest):
     """
@@ -4604,8 +5150,12 @@ def bulk_update_nodes(request: BulkUpdateRequest):
     
     conn = get_db()
     cursor = conn.cursor()
+    DB_WRITE_LOCK.acquire()
     
     try:
+        # Ein Update = eine IMMEDIATE-Transaktion (Schreib-Lock sofort)
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Prüfe ob append-Felder verwendet werden
         has_append = any([
             request.updates.append_name,
@@ -4617,118 +5167,89 @@ def bulk_update_nodes(request: BulkUpdateRequest):
         updated_count = 0
         
         if has_append:
-            # APPEND-Modus: Jeden Node einzeln updaten (wegen bestehende Werte lesen)
-            for node_id in request.node_ids:
-                # Hole aktuelle Werte
-                node = cursor.execute(
-                    "SELECT name, label, label_en, group_name FROM nodes WHERE id = ?",
-                    (node_id,)
-                ).fetchone()
-                
-                if not node:
-                    continue
-                
-                updates = []
-                params = []
-                
-                # Append Name (mit Leerzeichen)
-                if request.updates.append_name:
-                    current_name = node['name'] or ''
-                    new_name = f"{current_name} {request.updates.append_name}".strip()
-                    updates.append("name = ?")
-                    params.append(new_name)
-                
-                # Append Label (mit \n\n)
-                if request.updates.append_label:
-                    current_label = node['label'] or ''
-                    new_label = f"{current_label}\n\n{request.updates.append_label}".strip()
-                    updates.append("label = ?")
-                    params.append(new_label)
-                
-                # Append Label EN (mit \n\n)
-                if request.updates.append_label_en:
-                    current_label_en = node['label_en'] or ''
-                    new_label_en = f"{current_label_en}\n\n{request.updates.append_label_en}".strip()
-                    updates.append("label_en = ?")
-                    params.append(new_label_en)
-                
-                # Append Group Name (mit Leerzeichen)
-                if request.updates.append_group_name:
-                    current_group = node['group_name'] or ''
-                    new_group = f"{current_group} {request.updates.append_group_name}".strip()
-                    updates.append("group_name = ?")
-                    params.append(new_group)
-                
-                if updates:
-                    params.append(node_id)
-                    query = f"UPDATE nodes SET {', '.join(updates)} WHERE id = ?"
-                    cursor.execute(query, params)
-                    updated_count += cursor.rowcount
-                    
-                    # Synchronisiere node_labels wenn label geändert wurde
-                    if request.updates.append_label or request.updates.append_label_en:
-                        # Hole die jetzt aktualisierten Werte
-                        updated_node = cursor.execute(
-                            "SELECT label, label_en FROM nodes WHERE id = ?",
-                            (node_id,)
-                        ).fetchone()
-                        _sync_node_labels(cursor, node_id, updated_node['label'], updated_node['label_en'])
+            # APPEND-Modus: EIN UPDATE für alle Nodes, bestehende Werte werden in SQL erweitert
+            # TRIM mit BULK_APPEND_TRIM_CHARS entspricht str.strip() für ASCII-Whitespace
+            update_columns = []
+            params = []
+            
+            for column, value, separator in (
+                ('name', request.updates.append_name, ' '),             # Name mit Leerzeichen
+                ('label', request.updates.append_label, '\n\n'),        # Label mit \n\n
+                ('label_en', request.updates.append_label_en, '\n\n'),  # Label EN mit \n\n
+                ('group_name', request.updates.append_group_name, ' '), # Group Name mit Leerzeichen
+            ):
+                if value:
+                    update_columns.append(column)
+                    params.extend([separator, value, BULK_APPEND_TRIM_CHARS])
+            
+            placeholders = ','.join('?' * len(request.node_ids))
+            params.extend(request.node_ids)
+            
+            cursor.execute(
+                _bulk_update_sql(tuple(update_columns), True, len(request.node_ids)),
+                params
+            )
+            updated_count = cursor.rowcount
+            
+            # Synchronisiere node_labels wenn label geändert wurde (aktualisierte Werte in einer Abfrage)
+            if request.updates.append_label or request.updates.append_label_en:
+                updated_nodes = cursor.execute(
+                    f"SELECT id, code, label, label_en FROM nodes WHERE id IN ({placeholders})",
+                    request.node_ids
+                ).fetchall()
+                for updated_node in updated_nodes:
+                    _sync_node_labels(cursor, updated_node['id'], updated_node['label'],
+                                      updated_node['label_en'], updated_node['code'])
         else:
             # DIREKTER SET-Modus: Batch-Update
-            update_fields = []
+            update_columns = []
             params = []
             
             # WICHTIG: Auch leere Strings sind gültig (zum Löschen)
             if request.updates.name is not None:
-                update_fields.append("name = ?")
+                update_columns.append("name")
                 params.append(request.updates.name)
             
             if request.updates.label is not None:
-                update_fields.append("label = ?")
+                update_columns.append("label")
                 params.append(request.updates.label)
             
             if request.updates.label_en is not None:
-                update_fields.append("label_en = ?")
+                update_columns.append("label_en")
                 params.append(request.updates.label_en)
             
             if request.updates.group_name is not None:
-                update_fields.append("group_name = ?")
+                update_columns.append("group_name")
                 params.append(request.updates.group_name)
             
-            print(f"[BULK UPDATE] update_fields: {update_fields}, params: {params[:len(update_fields)]}")
+            logger.debug("[BULK UPDATE] update_columns=%s param_count=%d", update_columns, len(params))
             
-            if not update_fields:
+            if not update_columns:
                 raise HTTPException(status_code=400, detail="No valid update fields")
             
             # Batch Update
             placeholders = ','.join('?' * len(request.node_ids))
             params.extend(request.node_ids)
             
-            query = f"""
-                UPDATE nodes
-                SET {', '.join(update_fields)}
-                WHERE id IN ({placeholders})
-            """
+            query = _bulk_update_sql(tuple(update_columns), False, len(request.node_ids))
             
-            print(f"[BULK UPDATE] Executing query: {query}")
-            print(f"[BULK UPDATE] Full params: {params}")
+            logger.debug("[BULK UPDATE] query=%s node_count=%d", query, len(request.node_ids))
             
             cursor.execute(query, params)
             updated_count = cursor.rowcount
             
             # Synchronisiere node_labels für alle betroffenen Nodes wenn label geändert wurde
             if request.updates.label is not None or request.updates.label_en is not None:
-                for node_id in request.node_ids:
-                    # Hole die aktuellen label-Werte für diesen Node
-                    node = cursor.execute(
-                        "SELECT label, label_en FROM nodes WHERE id = ?",
-                        (node_id,)
-                    ).fetchone()
-                    
-                    if node:
-                        _sync_node_labels(cursor, node_id, node['label'], node['label_en'])
+                # Aktuelle label-Werte aller Nodes in einer Abfrage
+                updated_nodes = cursor.execute(
+                    f"SELECT id, code, label, label_en FROM nodes WHERE id IN ({placeholders})",
+                    request.node_ids
+                ).fetchall()
+                for node in updated_nodes:
+                    _sync_node_labels(cursor, node['id'], node['label'], node['label_en'], node['code'])
         
         conn.commit()
+        invalidate_family_cache()
         
         return BulkUpdateResponse(
             success=True,
@@ -4742,6 +5263,7 @@ def bulk_update_nodes(request: BulkUpdateRequest):
     
     finally:
         conn.close()
+        DB_WRITE_LOCK.release()
 
 
 # ============================================================
@@ -4759,8 +5281,12 @@ def update_node(node_id: int, request: UpdateNodeRequest):
     """
     conn = get_db()
     cursor = conn.cursor()
+    DB_WRITE_LOCK.acquire()
     
     try:
+        # Node + Propagation in einer IMMEDIATE-Transaktion (Schreib-Lock sofort)
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Prüfe ob Node existiert und hole aktuelle Daten
         existing = cursor.execute(
             "SELECT id, code, group_name FROM nodes WHERE id = ?", 
@@ -4798,13 +5324,14 @@ def update_node(node_id: int, request: UpdateNodeRequest):
             params.append(request.group_name)
             
             # UPDATE auch alle Nachkommen (alle Nodes die diesen Node als Ancestor haben)
+            # depth > 0 schließt den Self-Link aus; Lookup über PK (ancestor_id, ...)
             cursor.execute("""
                 UPDATE nodes 
                 SET group_name = ?
                 WHERE id IN (
                     SELECT descendant_id 
                     FROM node_paths 
-                    WHERE ancestor_id = ? AND ancestor_id != descendant_id
+                    WHERE ancestor_id = ? AND depth > 0
                 )
             """, (request.group_name, node_id))
         
@@ -4833,6 +5360,7 @@ def update_node(node_id: int, request: UpdateNodeRequest):
             _sync_node_labels(cursor, node_id, final_label_de, final_label_en)
         
         conn.commit()
+        invalidate_family_cache()
         
         return UpdateNodeResponse(
             success=True,
@@ -4849,6 +5377,7 @@ def update_node(node_id: int, request: UpdateNodeRequest):
         )
     finally:
         conn.close()
+        DB_WRITE_LOCK.release()
 
 
 # ============================================================
@@ -4857,20 +5386,22 @@ def update_node(node_id: int, request: UpdateNodeRequest):
 @app.post("/api/nodes/with-children", response_model=CreateNodeResponse)
 def create_node_with_children(request: CreateNodeWithChildrenRequest):
     """
-    Erstellt einen neuen Knoten und kopiert ganzen Subtree von Source Node.
+    Erstellt einen neuen Knoten und kopiert den Source Node als dessen Kind.
     
-    Verwendet Closure Table für effizienten Deep Copy (keine Rekursion!):
-    1. Eine Query holt alle Descendants vom Source Node
-    2. Simple Loop erstellt neue Nodes (sortiert nach depth)
-    3. ID-Mapping (alt → neu) für parent_id Lookup
-    4. Batch Insert für Closure Table Paths
-    
-    Performance: O(N) - sehr effizient auch für große Subtrees!
+    Kopiert wird nur der Source Node selbst (keine Children); die Closure Table
+    Paths legt trg_node_insert an:
+    1. Neuer Parent Node
+    2. Source Node laden
+    3. Kopie des Source Node unter dem neuen Parent
     """
     conn = get_db()
     cursor = conn.cursor()
+    DB_WRITE_LOCK.acquire()
     
     try:
+        # Gesamte Kopie in einer IMMEDIATE-Transaktion (Schreib-Lock sofort)
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # 1. Erstelle neuen Parent Node
         cursor.execute("""
             INSERT INTO nodes (code, name, label, label_en, level, parent_id, position, pattern, group_name)
@@ -4900,26 +5431,16 @@ def create_node_with_children(request: CreateNodeWithChildrenRequest):
         # Der User wählt im Frontend schrittweise aus wie tief kopiert werden soll
         # Wenn er ZABC auswählt → nur ZABC kopieren
         # Wenn er ZABC → 333 auswählt → sourceId ist 333 → nur 333 kopieren
-        descendants = cursor.execute("""
-            SELECT 
-                n.id,
-                n.code,
-                n.name,
-                n.label,
-                n.label_en,
-                n.level,
-                n.parent_id,
-                n.position,
-                n.pattern,
-                n.group_name,
-                0 as depth
-            FROM nodes n
-            WHERE n.id = ?
-        """, (request.source_node_id,)).fetchall()
+        source = cursor.execute("""
+            SELECT code, name, label, label_en, level, position, pattern, group_name
+            FROM nodes
+            WHERE id = ?
+        """, (request.source_node_id,)).fetchone()
         
-        if not descendants:
+        if not source:
             # Kein Subtree vorhanden - nur Parent erstellt
             conn.commit()
+            invalidate_family_cache()
             return CreateNodeResponse(
                 success=True,
                 node_id=new_parent_id,
@@ -4927,100 +5448,31 @@ def create_node_with_children(request: CreateNodeWithChildrenRequest):
                 nodes_created=1
             )
         
-        # 3. ID-Mapping: {alte_id → neue_id}
-        # Wichtig: Source Node wird als Kind vom new_parent erstellt, nicht als Ersatz!
-        old_to_new = {}
-        
-        # 4. Loop durch Descendants (depth-sortiert!)
-        for desc in descendants:
-            old_id = desc['id']
-            old_parent_id = desc['parent_id']
-            
-            # Spezialfall: Source Node selbst (depth=0) wird Kind vom neuen Parent
-            if desc['depth'] == 0:
-                new_desc_parent_id = new_parent_id
-            else:
-                # Lookup new parent_id im Mapping
-                new_desc_parent_id = old_to_new.get(old_parent_id)
-                if new_desc_parent_id is None:
-                    raise HTTPException(status_code=500, detail=f"Parent mapping not found for {old_id}")
-            
-            # INSERT neuer Node
-            cursor.execute("""
-                INSERT INTO nodes (code, name, label, label_en, level, parent_id, position, pattern, group_name)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                desc['code'],
-                desc['name'],
-                desc['label'],
-                desc['label_en'],
-                desc['level'],
-                new_desc_parent_id,  # Gemappter Parent!
-                desc['position'],
-                desc['pattern'],
-                desc['group_name']
-            ))
-            
-            new_desc_id = cursor.lastrowid
-            old_to_new[old_id] = new_desc_id
-        
-        # 5. Closure Table Paths erstellen
-        # Für jeden neuen Node: Kopiere alle Paths vom alten Node
-        for old_id, new_id in old_to_new.items():
-            # Hole alle ancestor paths vom alten Node
-            old_paths = cursor.execute("""
-                SELECT ancestor_id, depth
-                FROM node_paths
-                WHERE descendant_id = ?
-            """, (old_id,)).fetchall()
-            
-            for path in old_paths:
-                old_ancestor_id = path['ancestor_id']
-                depth = path['depth']
-                
-                # Mappe ancestor_id (oder nutze new_parent_id für externe Ancestors)
-                if old_ancestor_id in old_to_new:
-                    new_ancestor_id = old_to_new[old_ancestor_id]
-                else:
-                    # Ancestor außerhalb des kopierten Subtrees (z.B. Großeltern)
-                    # Diese müssen auch verbunden werden!
-                    if request.parent_id is not None:
-                        # Hole alle Ancestors des neuen Parents
-                        parent_ancestors = cursor.execute("""
-                            SELECT ancestor_id, depth
-                            FROM node_paths
-                            WHERE descendant_id = ?
-                        """, (new_parent_id,)).fetchall()
-                        
-                        for pa in parent_ancestors:
-                            # Depth = parent_ancestor_depth + 1 + desc_depth_in_subtree
-                            desc_depth_in_subtree = cursor.execute("""
-                                SELECT depth FROM node_paths
-                                WHERE ancestor_id = ? AND descendant_id = ?
-                            """, (request.source_node_id, old_id)).fetchone()['depth']
-                            
-                            total_depth = pa['depth'] + 1 + desc_depth_in_subtree
-                            
-                            cursor.execute("""
-                                INSERT OR IGNORE INTO node_paths (ancestor_id, descendant_id, depth)
-                                VALUES (?, ?, ?)
-                            """, (pa['ancestor_id'], new_id, total_depth))
-                    continue
-                
-                cursor.execute("""
-                    INSERT OR IGNORE INTO node_paths (ancestor_id, descendant_id, depth)
-                    VALUES (?, ?, ?)
-                """, (new_ancestor_id, new_id, depth))
+        # 3. Source Node als Kind vom neuen Parent kopieren
+        # trg_node_insert legt Self-Link + alle Paths über new_parent_id an
+        cursor.execute("""
+            INSERT INTO nodes (code, name, label, label_en, level, parent_id, position, pattern, group_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            source['code'],
+            source['name'],
+            source['label'],
+            source['label_en'],
+            source['level'],
+            new_parent_id,
+            source['position'],
+            source['pattern'],
+            source['group_name']
+        ))
         
         conn.commit()
-        
-        total_created = len(descendants) + 1  # Descendants (inkl. source node) + Parent
+        invalidate_family_cache()
         
         return CreateNodeResponse(
             success=True,
             node_id=new_parent_id,
-            message=f"Node created with {len(descendants)} children copied",
-            nodes_created=total_created
+            message="Node created with 1 children copied",
+            nodes_created=2
         )
         
     except Exception as e:
@@ -5031,6 +5483,7 @@ def create_node_with_children(request: CreateNodeWithChildrenRequest):
         )
     finally:
         conn.close()
+        DB_WRITE_LOCK.release()
 
 
 # ============================================================
@@ -5045,31 +5498,31 @@ def get_subtree_info(node_id: int):
     conn = get_db()
     
     try:
-        # Hole Node Info
+        # Node Info + Descendants-Anzahl + maximale Tiefe in einer Abfrage
+        # (ancestor_id, descendant_id) ist Primary Key: COUNT(*) statt COUNT(DISTINCT)
+        # läuft als reiner Range-Scan über den Index
         node = conn.execute("""
-            SELECT id, code, label
-            FROM nodes
-            WHERE id = ?
+            SELECT
+                n.id,
+                n.code,
+                n.label,
+                (SELECT COUNT(*) FROM node_paths np
+                 WHERE np.ancestor_id = n.id) - 1 as descendant_count,
+                (SELECT COALESCE(MAX(np.depth), 0) FROM node_paths np
+                 WHERE np.ancestor_id = n.id) as tree_depth
+            FROM nodes n
+            WHERE n.id = ?
         """, (node_id,)).fetchone()
         
         if not node:
             raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
         
-        # Zähle Descendants und finde maximale Tiefe
-        stats = conn.execute("""
-            SELECT 
-                COUNT(DISTINCT np.descendant_id) - 1 as descendant_count,
-                COALESCE(MAX(np.depth), 0) as tree_depth
-            FROM node_paths np
-            WHERE np.ancestor_id = ?
-        """, (node_id,)).fetchone()
-        
         return SubtreeInfo(
             node_id=node['id'],
             code=node['code'],
             label=node['label'],
-            descendant_count=stats['descendant_count'],
-            tree_depth=stats['tree_depth']
+            descendant_count=node['descendant_count'],
+            tree_depth=node['tree_depth']
         )
         
     finally:
@@ -5080,9 +5533,14 @@ def get_subtree_info(node_id: int):
 # Constraint Helper Functions
 # ============================================================
 
-def expand_code_range(range_str: str) -> List[str]:
+@lru_cache(maxsize=4096)
+def expand_code_range(range_str: str) -> Tuple[str, ...]:
     """
-    Expandiert einen Code-Range String zu einer Liste aller Codes.
+    Expandiert einen Code-Range String zu allen Codes im Bereich.
+    
+    Gecacht (deterministisch im Input): dieselben Constraint-Ranges werden bei
+    jeder Validierung erneut expandiert. Rückgabe ist ein Tuple, damit der
+    Cache-Inhalt nicht verändert werden kann.
     
     Unterstützte Formate:
     - C010-C020: Numerischer Bereich mit Prefix
@@ -5092,10 +5550,10 @@ def expand_code_range(range_str: str) -> List[str]:
     - PS001-PS999: Längere Prefixe mit numerischem Bereich
     
     Returns:
-        List[str]: Alle Codes im Bereich
+        Tuple[str, ...]: Alle Codes im Bereich
     """
     if '-' not in range_str:
-        return [range_str]  # Einzelner Code
+        return (range_str,)  # Einzelner Code
     
     try:
         start_str, end_str = range_str.split('-', 1)
@@ -5122,16 +5580,14 @@ def expand_code_range(range_str: str) -> List[str]:
             end_num = int(end_suffix)
             width = len(start_suffix)  # Padding-Breite
             
-            for num in range(start_num, end_num + 1):
-                codes.append(f"{prefix}{str(num).zfill(width)}")
+            codes = [f"{prefix}{num:0{width}d}" for num in range(start_num, end_num + 1)]
         
         # Alphabetischer Bereich (A-Z)
         elif len(start_suffix) == 1 and len(end_suffix) == 1 and start_suffix.isalpha() and end_suffix.isalpha():
             start_ord = ord(start_suffix.upper())
             end_ord = ord(end_suffix.upper())
             
-            for i in range(start_ord, end_ord + 1):
-                codes.append(f"{prefix}{chr(i)}")
+            codes = [f"{prefix}{chr(i)}" for i in range(start_ord, end_ord + 1)]
         
         # Alphanumerischer Bereich (0-9, A-Z)
         elif len(start_suffix) == 1 and len(end_suffix) == 1:
@@ -5140,8 +5596,7 @@ def expand_code_range(range_str: str) -> List[str]:
                 start_idx = chars.index(start_suffix.upper())
                 end_idx = chars.index(end_suffix.upper())
                 
-                for i in range(start_idx, end_idx + 1):
-                    codes.append(f"{prefix}{chars[i]}")
+                codes = [f"{prefix}{c}" for c in chars[start_idx:end_idx + 1]]
             except ValueError:
                 # Fallback: nur Start und End
                 codes = [start_str, end_str]
@@ -5152,44 +5607,38 @@ def expand_code_range(range_str: str) -> List[str]:
             if len(start_suffix) <= 2 and len(end_suffix) <= 2:
                 chars = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
                 
+                end_upper = end_suffix.upper()
+                # Alle 2-stelligen Kombinationen in Reihenfolge (00, 01, ..., ZZ)
+                two_char_codes = (c1 + c2 for c1, c2 in product(chars, repeat=2))
+                matching = None
+                
                 # 1-stellig zu 2-stellig
                 if len(start_suffix) == 1 and len(end_suffix) == 2:
                     # Erst alle 1-stelligen ab Start
                     start_idx = chars.index(start_suffix.upper())
-                    for i in range(start_idx, len(chars)):
-                        codes.append(f"{prefix}{chars[i]}")
+                    codes = [f"{prefix}{c}" for c in chars[start_idx:]]
                     
                     # Dann alle 2-stelligen bis End
-                    for c1 in chars:
-                        for c2 in chars:
-                            code = f"{c1}{c2}"
-                            if code <= end_suffix.upper():
-                                codes.append(f"{prefix}{code}")
-                            if len(codes) > 1000:
-                                break
-                        if len(codes) > 1000:
-                            break
+                    matching = (code for code in two_char_codes if code <= end_upper)
                 
                 # Beide 2-stellig
                 elif len(start_suffix) == 2 and len(end_suffix) == 2:
-                    for c1 in chars:
-                        for c2 in chars:
-                            code = f"{c1}{c2}"
-                            if start_suffix.upper() <= code <= end_suffix.upper():
-                                codes.append(f"{prefix}{code}")
-                            if len(codes) > 1000:
-                                break
-                        if len(codes) > 1000:
-                            break
+                    start_upper = start_suffix.upper()
+                    matching = (code for code in two_char_codes if start_upper <= code <= end_upper)
+                
+                if matching is not None:
+                    # Abbruch sobald mehr als 1000 Codes erzeugt wurden (max. 1001 Einträge)
+                    remaining = max(0, 1001 - len(codes))
+                    codes.extend(f"{prefix}{code}" for code in islice(matching, remaining))
             else:
                 # Zu komplex, nur Start und End
                 codes = [start_str, end_str]
         
-        return codes if codes else [start_str, end_str]
+        return tuple(codes) if codes else (start_str, end_str)
     
     except Exception as e:
         print(f"Error expanding range '{range_str}': {e}")
-        return [range_str]  # Fallback auf Original
+        return (range_str,)  # Fallback auf Original
 
 
 def check_pattern_match(code_length: int, pattern_value: str) -> bool:
@@ -5218,11 +5667,121 @@ def check_pattern_match(code_length: int, pattern_value: str) -> bool:
             return False
 
 
+def _compile_pattern_length(pattern_value: str) -> Optional[Tuple[int, int]]:
+    """
+    Parst ein Pattern ("5", "4-6") einmalig in (min_len, max_len).
+    
+    Gleiche Semantik wie check_pattern_match; None = ungültiges Pattern (matcht nie).
+    """
+    try:
+        if '-' in pattern_value:
+            min_len, max_len = map(int, pattern_value.split('-'))
+            return (min_len, max_len)
+        exact_len = int(pattern_value)
+        return (exact_len, exact_len)
+    except (ValueError, TypeError):
+        return None
+
+
+class CompiledConstraint(NamedTuple):
+    """Constraint inkl. Conditions und expandierter Code-Menge (für die Validierung)"""
+    id: int
+    level: int
+    mode: str
+    description: Optional[str]
+    conditions: tuple    # ((condition_type, target_level, value, length_range), ...)
+    code_entries: tuple  # ((code_type, code_value), ...) wie gespeichert
+    codes: frozenset     # Alle Codes (Ranges expandiert)
+    required_levels: frozenset  # target_levels aller Conditions
+
+
+@db_cache(maxsize=64)
+def get_compiled_constraints(level: int) -> Tuple[CompiledConstraint, ...]:
+    """
+    Lädt alle Constraints eines Levels inkl. Conditions und Codes (3 Queries statt 1 + 2 pro Constraint).
+    
+    Gecacht, da jede Validierung dieselben Constraints braucht.
+    Constraint-Endpoints rufen invalidate_constraint_cache() auf; Änderungen
+    anderer Prozesse (import_data.py) erkennt db_cache.
+    """
+    conn = get_db()
+    try:
+        constraints_rows = conn.execute("""
+            SELECT id, level, mode, description
+            FROM constraints
+            WHERE level = ?
+        """, (level,)).fetchall()
+        
+        if not constraints_rows:
+            return ()
+        
+        conditions_by_constraint = defaultdict(list)
+        for cond in conn.execute("""
+            SELECT constraint_id, condition_type, target_level, value
+            FROM constraint_conditions
+            WHERE constraint_id IN (SELECT id FROM constraints WHERE level = ?)
+            ORDER BY id
+        """, (level,)):
+            # Pattern-Conditions werden hier vorab in (min_len, max_len) übersetzt
+            length_range = (
+                _compile_pattern_length(cond['value'])
+                if cond['condition_type'] == 'pattern' else None
+            )
+            conditions_by_constraint[cond['constraint_id']].append(
+                (cond['condition_type'], cond['target_level'], cond['value'], length_range)
+            )
+        
+        codes_by_constraint = defaultdict(list)
+        for code_row in conn.execute("""
+            SELECT constraint_id, code_type, code_value
+            FROM constraint_codes
+            WHERE constraint_id IN (SELECT id FROM constraints WHERE level = ?)
+            ORDER BY id
+        """, (level,)):
+            codes_by_constraint[code_row['constraint_id']].append(
+                (code_row['code_type'], code_row['code_value'])
+            )
+    finally:
+        conn.close()
+    
+    compiled = []
+    for constraint_row in constraints_rows:
+        constraint_id = constraint_row['id']
+        code_entries = tuple(codes_by_constraint.get(constraint_id, ()))
+        
+        # Expandiere Ranges
+        all_codes = set()
+        for code_type, code_value in code_entries:
+            if code_type == 'single':
+                all_codes.add(code_value)
+            elif code_type == 'range':
+                all_codes.update(expand_code_range(code_value))
+        
+        conditions = tuple(conditions_by_constraint.get(constraint_id, ()))
+        compiled.append(CompiledConstraint(
+            id=constraint_id,
+            level=constraint_row['level'],
+            mode=constraint_row['mode'],
+            description=constraint_row['description'],
+            conditions=conditions,
+            code_entries=code_entries,
+            codes=frozenset(all_codes),
+            required_levels=frozenset(target_level for _, target_level, _, _ in conditions)
+        ))
+    
+    return tuple(compiled)
+
+
+def invalidate_constraint_cache():
+    """Verwirft gecachte Constraints und Validierungsergebnisse (nach Create/Update/Delete von Constraints)"""
+    get_compiled_constraints.cache_clear()
+    _validate_code_cached.cache_clear()
+
+
 def validate_code_against_constraints(
     code: str,
     level: int,
-    previous_selections: dict,
-    conn
+    previous_selections: dict
 ) -> ConstraintValidationResult:
     """
     Prüft ob ein Code gegen definierte Constraints verstößt.
@@ -5231,41 +5790,27 @@ def validate_code_against_constraints(
         code: Der zu prüfende Code
         level: Level auf dem der Code erstellt werden soll
         previous_selections: Dict {level: code} der vorherigen Auswahlen
-        conn: Datenbankverbindung
     
     Returns:
         ConstraintValidationResult mit is_valid und violated_constraints
     """
-    # Hole alle Constraints für dieses Level
-    constraints_rows = conn.execute("""
-        SELECT id, level, mode, description, created_at, updated_at
-        FROM constraints
-        WHERE level = ?
-    """, (level,)).fetchall()
+    # Hole alle Constraints für dieses Level (gecacht, keine DB-Zugriffe)
+    compiled_constraints = get_compiled_constraints(level)
     
-    if not constraints_rows:
+    if not compiled_constraints:
         return ConstraintValidationResult(is_valid=True)
     
     violated = []
     
-    for constraint_row in constraints_rows:
-        constraint_id = constraint_row['id']
-        
-        # Hole Bedingungen
-        conditions_rows = conn.execute("""
-            SELECT condition_type, target_level, value
-            FROM constraint_conditions
-            WHERE constraint_id = ?
-        """, (constraint_id,)).fetchall()
+    for constraint in compiled_constraints:
+        # Fehlt eine Auswahl für ein benötigtes Level, kann die Constraint nicht greifen
+        if not constraint.required_levels.issubset(previous_selections):
+            continue
         
         # Prüfe ob ALLE Bedingungen erfüllt sind
         all_conditions_met = True
         
-        for cond in conditions_rows:
-            target_level = cond['target_level']
-            condition_type = cond['condition_type']
-            value = cond['value']
-            
+        for condition_type, target_level, value, length_range in constraint.conditions:
             # Hole den Code vom target_level
             target_code = previous_selections.get(target_level)
             
@@ -5285,82 +5830,40 @@ def validate_code_against_constraints(
                     break
             
             elif condition_type == 'pattern':
-                if not check_pattern_match(len(target_code), value):
+                # Vorkompiliert (siehe _compile_pattern_length)
+                if length_range is None or not (length_range[0] <= len(target_code) <= length_range[1]):
                     all_conditions_met = False
                     break
         
         # Wenn alle Bedingungen erfüllt -> Constraint gilt!
-        if all_conditions_met:
-            # Hole erlaubte/verbotene Codes
-            codes_rows = conn.execute("""
-                SELECT code_type, code_value
-                FROM constraint_codes
-                WHERE constraint_id = ?
-            """, (constraint_id,)).fetchall()
-            
-            # Expandiere Ranges
-            all_codes = []
-            for code_row in codes_rows:
-                if code_row['code_type'] == 'single':
-                    all_codes.append(code_row['code_value'])
-                elif code_row['code_type'] == 'range':
-                    all_codes.extend(expand_code_range(code_row['code_value']))
-            
-            # Prüfe Mode
-            mode = constraint_row['mode']
-            
-            if mode == 'allow':
-                # Whitelist: Code MUSS in Liste sein
-                if code not in all_codes:
-                    # Hole vollständiges Constraint-Objekt
-                    conditions = [
-                        ConstraintCondition(
-                            condition_type=c['condition_type'],
-                            target_level=c['target_level'],
-                            value=c['value']
-                        ) for c in conditions_rows
-                    ]
-                    codes = [
-                        ConstraintCode(
-                            code_type=c['code_type'],
-                            code_value=c['code_value']
-                        ) for c in codes_rows
-                    ]
-                    
-                    violated.append(Constraint(
-                        id=constraint_id,
-                        level=constraint_row['level'],
-                        mode=constraint_row['mode'],
-                        description=constraint_row['description'],
-                        conditions=conditions,
-                        codes=codes
-                    ))
-            
-            elif mode == 'deny':
-                # Blacklist: Code darf NICHT in Liste sein
-                if code in all_codes:
-                    conditions = [
-                        ConstraintCondition(
-                            condition_type=c['condition_type'],
-                            target_level=c['target_level'],
-                            value=c['value']
-                        ) for c in conditions_rows
-                    ]
-                    codes = [
-                        ConstraintCode(
-                            code_type=c['code_type'],
-                            code_value=c['code_value']
-                        ) for c in codes_rows
-                    ]
-                    
-                    violated.append(Constraint(
-                        id=constraint_id,
-                        level=constraint_row['level'],
-                        mode=constraint_row['mode'],
-                        description=constraint_row['description'],
-                        conditions=conditions,
-                        codes=codes
-                    ))
+        if not all_conditions_met:
+            continue
+        
+        # Prüfe Mode
+        # allow = Whitelist: Code MUSS in Liste sein
+        # deny  = Blacklist: Code darf NICHT in Liste sein
+        if (constraint.mode == 'allow' and code not in constraint.codes) or \
+           (constraint.mode == 'deny' and code in constraint.codes):
+            # Vollständiges Constraint-Objekt
+            violated.append(Constraint(
+                id=constraint.id,
+                level=constraint.level,
+                mode=constraint.mode,
+                description=constraint.description,
+                conditions=[
+                    ConstraintCondition(
+                        condition_type=condition_type,
+                        target_level=target_level,
+                        value=value
+                    ) for condition_type, target_level, value, _ in constraint.conditions
+                ],
+                codes=[
+                    ConstraintCode(
+                        code_type=code_type,
+                        code_value=code_value
+                    ) for code_type, code_value in constraint.code_entries
+                ]
+            ))
     
     if violated:
         msg = f"Code '{code}' verstößt gegen {len(violated)} Constraint(s)"
@@ -5373,10 +5876,82 @@ def validate_code_against_constraints(
     return ConstraintValidationResult(is_valid=True)
 
 
+@db_cache(maxsize=4096)
+def _validate_code_cached(code: str, level: int, selections_key: tuple) -> ConstraintValidationResult:
+    """
+    Gecachte Variante von validate_code_against_constraints.
+    
+    selections_key: sortierte (level, code)-Paare der vorherigen Auswahlen (hashbar).
+    Wird wie get_compiled_constraints bei jeder DB-Änderung verworfen (db_cache).
+    """
+    return validate_code_against_constraints(code, level, dict(selections_key))
+
+
 # ============================================================
 # Constraint CRUD Endpoints
 # ============================================================
 
+# SQL als Modul-Konstanten: derselbe Text in Create/Update => Treffer im
+# Statement-Cache der Connection (DB_CACHED_STATEMENTS) statt erneutem Parsen
+CONSTRAINT_CONDITION_INSERT_SQL = """
+    INSERT INTO constraint_conditions (constraint_id, condition_type, target_level, value)
+    VALUES (?, ?, ?, ?)
+"""
+CONSTRAINT_CODE_INSERT_SQL = """
+    INSERT INTO constraint_codes (constraint_id, code_type, code_value)
+    VALUES (?, ?, ?)
+"""
+
+
+def _fetch_constraint(conn, constraint_id: int) -> Optional[Constraint]:
+    """Lädt ein einzelnes Constraint inkl. Conditions und Codes (Point-Lookups über constraint_id)"""
+    row = conn.execute("""
+        SELECT id, level, mode, description, created_at, updated_at
+        FROM constraints
+        WHERE id = ?
+    """, (constraint_id,)).fetchone()
+    
+    if not row:
+        return None
+    
+    conditions = [
+        ConstraintCondition(
+            id=c['id'],
+            condition_type=c['condition_type'],
+            target_level=c['target_level'],
+            value=c['value']
+        ) for c in conn.execute("""
+            SELECT id, condition_type, target_level, value
+            FROM constraint_conditions
+            WHERE constraint_id = ?
+            ORDER BY id
+        """, (constraint_id,))
+    ]
+    
+    codes = [
+        ConstraintCode(
+            id=c['id'],
+            code_type=c['code_type'],
+            code_value=c['code_value']
+        ) for c in conn.execute("""
+            SELECT id, code_type, code_value
+            FROM constraint_codes
+            WHERE constraint_id = ?
+            ORDER BY id
+        """, (constraint_id,))
+    ]
+    
+    return Constraint(
+        id=row['id'],
+        level=row['level'],
+        mode=row['mode'],
+        description=row['description'],
+        conditions=conditions,
+        codes=codes,
+        created_at=row['created_at'],
+        updated_at=row['updated_at']
+    )
+
 @app.get("/api/constraints/level/{level}", response_model=List[Constraint])
 def get_constraints_for_level(level: int):
     """
@@ -5393,58 +5968,57 @@ def get_constraints_for_level(level: int):
             ORDER BY id
         """, (level,)).fetchall()
         
-        constraints = []
+        if not constraints_rows:
+            return []
         
-        for row in constraints_rows:
-            constraint_id = row['id']
-            
-            # Hole Conditions
-            conditions_rows = conn.execute("""
-                SELECT id, condition_type, target_level, value
-                FROM constraint_conditions
-                WHERE constraint_id = ?
-            """, (constraint_id,)).fetchall()
-            
-            conditions = [
-                ConstraintCondition(
-                    id=c['id'],
-                    condition_type=c['condition_type'],
-                    target_level=c['target_level'],
-                    value=c['value']
-                ) for c in conditions_rows
-            ]
-            
-            # Hole Codes
-            codes_rows = conn.execute("""
-                SELECT id, code_type, code_value
-                FROM constraint_codes
-                WHERE constraint_id = ?
-            """, (constraint_id,)).fetchall()
-            
-            codes = [
-                ConstraintCode(
-                    id=c['id'],
-                    code_type=c['code_type'],
-                    code_value=c['code_value']
-                ) for c in codes_rows
-            ]
-            
-            constraints.append(Constraint(
+        # Conditions und Codes aller Constraints mit je EINER Query (statt 2 pro Constraint)
+        constraint_ids = [row['id'] for row in constraints_rows]
+        placeholders = ','.join('?' * len(constraint_ids))
+        
+        conditions_by_constraint = defaultdict(list)
+        for c in conn.execute(f"""
+            SELECT constraint_id, id, condition_type, target_level, value
+            FROM constraint_conditions
+            WHERE constraint_id IN ({placeholders})
+            ORDER BY id
+        """, constraint_ids):
+            conditions_by_constraint[c['constraint_id']].append(ConstraintCondition(
+                id=c['id'],
+                condition_type=c['condition_type'],
+                target_level=c['target_level'],
+                value=c['value']
+            ))
+        
+        codes_by_constraint = defaultdict(list)
+        for c in conn.execute(f"""
+            SELECT constraint_id, id, code_type, code_value
+            FROM constraint_codes
+            WHERE constraint_id IN ({placeholders})
+            ORDER BY id
+        """, constraint_ids):
+            codes_by_constraint[c['constraint_id']].append(ConstraintCode(
+                id=c['id'],
+                code_type=c['code_type'],
+                code_value=c['code_value']
+            ))
+        
+        constraints = [
+            Constraint(
                 id=row['id'],
                 level=row['level'],
                 mode=row['mode'],
                 description=row['description'],
-                conditions=conditions,
-                codes=codes,
+                conditions=conditions_by_constraint[row['id']],
+                codes=codes_by_constraint[row['id']],
                 created_at=row['created_at'],
                 updated_at=row['updated_at']
-            ))
+            ) for row in constraints_rows
+        ]
         
         return constraints
     
     except Exception as e:
         print(f"[ERROR] get_constraints_for_level: {e}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to load constraints: {str(e)}")
     
@@ -5457,12 +6031,13 @@ def create_constraint(request: CreateConstraintRequest):
     """
     Erstellt eine neue Constraint-Regel.
     """
-    print(f"[CREATE CONSTRAINT] Request: {request}")
-    
     conn = get_db()
     cursor = conn.cursor()
     
     try:
+        # Constraint + Conditions + Codes in einer IMMEDIATE-Transaktion
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Insert Constraint
         cursor.execute("""
             INSERT INTO constraints (level, mode, description)
@@ -5470,48 +6045,40 @@ def create_constraint(request: CreateConstraintRequest):
         """, (request.level, request.mode, request.description))
         
         constraint_id = cursor.lastrowid
-        print(f"[CREATE CONSTRAINT] Created constraint ID: {constraint_id}")
+        logger.debug("[CREATE CONSTRAINT] Created constraint ID: %s", constraint_id)
         
-        # Insert Conditions
-        for cond in request.conditions:
-            cursor.execute("""
-                INSERT INTO constraint_conditions (constraint_id, condition_type, target_level, value)
-                VALUES (?, ?, ?, ?)
-            """, (constraint_id, cond.condition_type, cond.target_level, cond.value))
+        # Insert Conditions (ein executemany)
+        cursor.executemany(CONSTRAINT_CONDITION_INSERT_SQL, [
+            (constraint_id, cond.condition_type, cond.target_level, cond.value)
+            for cond in request.conditions
+        ])
         
-        # Insert Codes
-        for code in request.codes:
-            cursor.execute("""
-                INSERT INTO constraint_codes (constraint_id, code_type, code_value)
-                VALUES (?, ?, ?)
-            """, (constraint_id, code.code_type, code.code_value))
+        # Insert Codes (ein executemany)
+        cursor.executemany(CONSTRAINT_CODE_INSERT_SQL, [
+            (constraint_id, code.code_type, code.code_value)
+            for code in request.codes
+        ])
         
         conn.commit()
-        print(f"[CREATE CONSTRAINT] Committed to database")
-        
-        # Schließe Verbindung BEVOR wir get_constraints_for_level aufrufen
-        conn.close()
+        invalidate_constraint_cache()
         
-        # Hole vollständiges Constraint-Objekt (öffnet neue Verbindung)
-        result = get_constraints_for_level(request.level)
-        created = next((c for c in result if c.id == constraint_id), None)
+        # Hole vollständiges Constraint-Objekt (gleiche Verbindung, nur dieses Constraint)
+        created = _fetch_constraint(conn, constraint_id)
         
         if not created:
             raise HTTPException(status_code=500, detail="Failed to retrieve created constraint")
         
-        print(f"[CREATE CONSTRAINT] Success: {created}")
+        logger.debug("[CREATE CONSTRAINT] Committed constraint %s (level %s)", constraint_id, request.level)
         return created
     
     except Exception as e:
         print(f"[ERROR] create_constraint: {e}")
-        import traceback
         traceback.print_exc()
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create constraint: {str(e)}")
     
     finally:
-        if conn:
-            conn.close()
+        conn.close()
 
 
 @app.put("/api/constraints/{constraint_id}", response_model=Constraint)
@@ -5523,6 +6090,9 @@ def update_constraint(constraint_id: int, request: CreateConstraintRequest):
     cursor = conn.cursor()
     
     try:
+        # Constraint + Conditions + Codes in einer IMMEDIATE-Transaktion
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # Update Constraint
         cursor.execute("""
             UPDATE constraints
@@ -5537,27 +6107,26 @@ def update_constraint(constraint_id: int, request: CreateConstraintRequest):
         cursor.execute("DELETE FROM constraint_conditions WHERE constraint_id = ?", (constraint_id,))
         cursor.execute("DELETE FROM constraint_codes WHERE constraint_id = ?", (constraint_id,))
         
-        # Insert neue Conditions
-        for cond in request.conditions:
-            cursor.execute("""
-                INSERT INTO constraint_conditions (constraint_id, condition_type, target_level, value)
-                VALUES (?, ?, ?, ?)
-            """, (constraint_id, cond.condition_type, cond.target_level, cond.value))
+        # Insert neue Conditions (ein executemany)
+        cursor.executemany(CONSTRAINT_CONDITION_INSERT_SQL, [
+            (constraint_id, cond.condition_type, cond.target_level, cond.value)
+            for cond in request.conditions
+        ])
         
-        # Insert neue Codes
-        for code in request.codes:
-            cursor.execute("""
-                INSERT INTO constraint_codes (constraint_id, code_type, code_value)
-                VALUES (?, ?, ?)
-            """, (constraint_id, code.code_type, code.code_value))
+        # Insert neue Codes (ein executemany)
+        cursor.executemany(CONSTRAINT_CODE_INSERT_SQL, [
+            (constraint_id, code.code_type, code.code_value)
+            for code in request.codes
+        ])
         
         conn.commit()
+        invalidate_constraint_cache()
         
-        # Hole aktualisiertes Constraint
-        result = get_constraints_for_level(request.level)
-        updated = next((c for c in result if c.id == constraint_id), None)
+        # Hole aktualisiertes Constraint (gleiche Verbindung, nur dieses Constraint)
+        # Level wird nicht aktualisiert: weicht request.level ab, bleibt es beim Fehler wie bisher
+        updated = _fetch_constraint(conn, constraint_id)
         
-        if not updated:
+        if not updated or updated.level != request.level:
             raise HTTPException(status_code=500, detail="Failed to retrieve updated constraint")
         
         return updated
@@ -5587,6 +6156,7 @@ def delete_constraint(constraint_id: int):
             raise HTTPException(status_code=404, detail="Constraint not found")
         
         conn.commit()
+        invalidate_constraint_cache()
         
         return {"success": True, "message": f"Constraint {constraint_id} deleted"}
     
@@ -5608,19 +6178,12 @@ def validate_code(request: ConstraintValidationRequest):
     Args:
         request: ValidationRequest mit code, level, previous_selections
     """
-    conn = get_db()
-    
-    try:
-        result = validate_code_against_constraints(
-            request.code, 
-            request.level, 
-            request.previous_selections, 
-            conn
-        )
-        return result
-    
-    finally:
-        conn.close()
+    # Ergebnis hängt nur von Code, Level und Auswahl ab → gecacht (siehe invalidate_constraint_cache)
+    return _validate_code_cached(
+        request.code,
+        request.level,
+        tuple(sorted(request.previous_selections.items()))
+    )
 
 
 # ============================================================
@@ -5662,16 +6225,98 @@ class PictureInfo(BaseModel):
     description: Optional[str] = None
     uploaded_at: str
 
-class LinkInfo(BaseModel):
-    """Info über einen Link"""
-    url: str
-    title: str
-    description: Optional[str] = None
-    added_at: Optional[str] = None
+class LinkInfo(BaseModel):
+    """Info über einen Link"""
+    url: str
+    title: str
+    description: Optional[str] = None
+    added_at: Optional[str] = None
+
+
+# JSON-Arrays (pictures/links) werden direkt in SQLite geändert: ein UPDATE statt
+# SELECT → json.loads → append/filter → json.dumps → UPDATE
+_NODE_JSON_ARRAY_COLUMNS = ('pictures', 'links')
+
+
+def _json_array_append(cursor, column: str, node_id: int, item: dict) -> bool:
+    """Hängt item an nodes.<column> an. Returns: False wenn Node nicht existiert"""
+    assert column in _NODE_JSON_ARRAY_COLUMNS
+    cursor.execute(f"""
+        UPDATE nodes
+        SET {column} = json_insert(COALESCE(NULLIF({column}, ''), '[]'), '$[#]', json(?))
+        WHERE id = ?
+    """, (json.dumps(item), node_id))
+    return cursor.rowcount > 0
+
+
+def _json_array_remove_by_url(cursor, column: str, node_id: int, url: str) -> Optional[bool]:
+    """
+    Entfernt alle Einträge mit dieser url aus nodes.<column>.
+    
+    Returns: True wenn entfernt, False wenn kein Eintrag passt, None wenn Node nicht existiert
+    """
+    assert column in _NODE_JSON_ARRAY_COLUMNS
+    cursor.execute(f"""
+        UPDATE nodes
+        SET {column} = (
+            SELECT json_group_array(json(value))
+            FROM json_each(nodes.{column})
+            WHERE json_extract(value, '$.url') IS NOT ?
+        )
+        WHERE id = ?
+          AND EXISTS (
+              SELECT 1 FROM json_each(nodes.{column})
+              WHERE json_extract(value, '$.url') = ?
+          )
+    """, (url, node_id, url))
+    if cursor.rowcount > 0:
+        return True
+    
+    # Nichts geändert: Node fehlt oder Eintrag nicht vorhanden
+    cursor.execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,))
+    return False if cursor.fetchone() else None
+
+
+def _persist_picture_record(node_id: int, file_url: str, description: Optional[str],
+                            uploaded_at: str, file_path: Optional[Path]):
+    """
+    Hängt das hochgeladene Bild an nodes.pictures an (läuft als Background Task).
+    
+    Bei einem DB-Fehler wird die lokale Datei wieder gelöscht.
+    """
+    conn = get_db(row_factory=None)
+    cursor = conn.cursor()
+    
+    try:
+        new_picture = {
+            "url": file_url,
+            "description": description,
+            "uploaded_at": uploaded_at
+        }
+        if not _json_array_append(cursor, 'pictures', node_id, new_picture):
+            raise ValueError(f"Node {node_id} nicht gefunden")
+        
+        conn.commit()
+        invalidate_family_cache()
+        
+    except Exception:
+        conn.rollback()
+        logger.exception("[UPLOAD IMAGE] Bild %s konnte nicht gespeichert werden", file_url)
+        # Lösche Datei bei DB-Fehler
+        if file_path is not None:
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    finally:
+        conn.close()
+
 
 @app.post("/api/nodes/{node_id}/upload-image")
 async def upload_node_image(
     node_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     description: Optional[str] = Form(None)
 ):
@@ -5679,6 +6324,9 @@ async def upload_node_image(
     Lädt ein Bild für einen Node hoch und speichert die URL in der Datenbank.
     Unterstützt lokalen Upload (Entwicklung) und Azure Blob Storage (Produktion).
     
+    Der DB-Eintrag wird nach dem Senden der Response geschrieben (Background Task);
+    ob der Node existiert, wird vorab geprüft.
+    
     Args:
         node_id: Node ID in der Datenbank
         file: Hochzuladende Bilddatei
@@ -5697,6 +6345,16 @@ async def upload_node_image(
             detail=f"Ungültiger Dateityp. Erlaubt: {', '.join(allowed_extensions)}"
         )
     
+    # Prüfe ob Node existiert (vor dem Upload, damit keine verwaisten Dateien entstehen)
+    conn = get_db(row_factory=None)
+    try:
+        node_exists = conn.execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,)).fetchone()
+    finally:
+        conn.close()
+    
+    if not node_exists:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
+    
     # Generiere eindeutigen Dateinamen
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_filename = f"node_{node_id}_{timestamp}{file_ext}"
@@ -5704,18 +6362,24 @@ async def upload_node_image(
     # Upload-Logik: Azure oder Lokal
     uploaded_at = datetime.now().isoformat()
     
+    file_path = None
+    
     if blob_service:
         # PRODUKTION: Upload zu Azure Blob Storage
         try:
-            # Lese Datei-Inhalt
-            file_content = await file.read()
-            
-            # Upload zu Azure Blob
+            # Upload zu Azure Blob: streamt direkt aus der (gespoolten) Upload-Datei,
+            # ohne sie komplett einzulesen; der synchrone Client läuft im Threadpool,
+            # damit der Event-Loop während des Uploads nicht blockiert
             blob_client = blob_service.get_blob_client(
                 container="uploads",
                 blob=safe_filename
             )
-            blob_client.upload_blob(file_content, overwrite=True)
+            await run_in_threadpool(
+                blob_client.upload_blob,
+                file.file,
+                length=file.size,
+                overwrite=True
+            )
             
             # Azure URL (absolut)
             file_url = blob_client.url
@@ -5731,7 +6395,7 @@ async def upload_node_image(
         
         try:
             with file_path.open("wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+                shutil.copyfileobj(file.file, buffer, UPLOAD_COPY_BUFFER_SIZE)
             
             # Relativer Pfad (wird vom Frontend mit API_BASE_URL kombiniert)
             file_url = f"/uploads/{safe_filename}"
@@ -5742,52 +6406,16 @@ async def upload_node_image(
                 detail=f"Lokaler Upload Fehler: {str(e)}"
             )
     
-    # Speichere in Datenbank (in pictures JSON array)
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Prüfe ob Node existiert
-        cursor.execute("SELECT id, pictures FROM nodes WHERE id = ?", (node_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
-        
-        # Parse existierende Bilder (JSON)
-        import json
-        existing_pictures = json.loads(row[1]) if row[1] else []
-        
-        # Füge neues Bild hinzu
-        new_picture = {
-            "url": file_url,
-            "description": description,
-            "uploaded_at": uploaded_at
-        }
-        existing_pictures.append(new_picture)
-        
-        # Update in DB
-        cursor.execute(
-            "UPDATE nodes SET pictures = ? WHERE id = ?",
-            (json.dumps(existing_pictures), node_id)
-        )
-        conn.commit()
-        conn.close()
-        
-        return PictureInfo(
-            url=file_url,
-            description=description,
-            uploaded_at=uploaded_at
-        )
-        
-    except Exception as e:
-        # Lösche Datei bei DB-Fehler
-        if file_path.exists():
-            file_path.unlink()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Datenbankfehler: {str(e)}"
-        )
+    # Speichere in Datenbank (in pictures JSON array) - nach dem Senden der Response
+    background_tasks.add_task(
+        _persist_picture_record, node_id, file_url, description, uploaded_at, file_path
+    )
+    
+    return PictureInfo(
+        url=file_url,
+        description=description,
+        uploaded_at=uploaded_at
+    )
 
 
 @app.delete("/api/nodes/{node_id}/images/{filename}")
@@ -5799,37 +6427,23 @@ async def delete_node_image(node_id: int, filename: str):
         node_id: Node ID
         filename: Dateiname des zu löschenden Bildes
     """
-    import json
-    
     file_path = UPLOADS_DIR / filename
     file_url = f"/uploads/{filename}"
     
+    conn = get_db(row_factory=None)
+    cursor = conn.cursor()
+    
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Hole existierende Bilder
-        cursor.execute("SELECT pictures FROM nodes WHERE id = ?", (node_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
-        
-        existing_pictures = json.loads(row[0]) if row[0] else []
-        
         # Entferne Bild aus Liste
-        updated_pictures = [p for p in existing_pictures if p.get('url') != file_url]
+        removed = _json_array_remove_by_url(cursor, 'pictures', node_id, file_url)
         
-        if len(updated_pictures) == len(existing_pictures):
+        if removed is None:
+            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
+        if not removed:
             raise HTTPException(status_code=404, detail="Bild nicht in Datenbank gefunden")
         
-        # Update DB
-        cursor.execute(
-            "UPDATE nodes SET pictures = ? WHERE id = ?",
-            (json.dumps(updated_pictures), node_id)
-        )
         conn.commit()
-        conn.close()
+        invalidate_family_cache()
         
         # Lösche Datei
         if file_path.exists():
@@ -5844,6 +6458,9 @@ async def delete_node_image(node_id: int, filename: str):
             status_code=500,
             detail=f"Fehler beim Löschen: {str(e)}"
         )
+    
+    finally:
+        conn.close()
 
 
 # ============================================================
@@ -5866,22 +6483,10 @@ async def add_node_link(
         title: Link-Titel
         description: Optionale Beschreibung
     """
-    import json
-    from datetime import datetime
+    conn = get_db(row_factory=None)
+    cursor = conn.cursor()
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Hole existierende Links
-        cursor.execute("SELECT links FROM nodes WHERE id = ?", (node_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
-        
-        existing_links = json.loads(row[0]) if row[0] else []
-        
         # Erstelle neuen Link
         added_at = datetime.now().isoformat()
         new_link = {
@@ -5891,15 +6496,12 @@ async def add_node_link(
             "added_at": added_at
         }
         
-        existing_links.append(new_link)
+        # Anhängen (prüft zugleich ob Node existiert)
+        if not _json_array_append(cursor, 'links', node_id, new_link):
+            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
         
-        # Update DB
-        cursor.execute(
-            "UPDATE nodes SET links = ? WHERE id = ?",
-            (json.dumps(existing_links), node_id)
-        )
         conn.commit()
-        conn.close()
+        invalidate_family_cache()
         
         return LinkInfo(
             url=url,
@@ -5913,6 +6515,9 @@ async def add_node_link(
             status_code=500,
             detail=f"Fehler beim Hinzufügen des Links: {str(e)}"
         )
+    
+    finally:
+        conn.close()
 
 
 @app.delete("/api/nodes/{node_id}/links")
@@ -5924,34 +6529,20 @@ async def delete_node_link(node_id: int, url: str):
         node_id: Node ID
         url: URL des zu löschenden Links
     """
-    import json
+    conn = get_db(row_factory=None)
+    cursor = conn.cursor()
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Hole existierende Links
-        cursor.execute("SELECT links FROM nodes WHERE id = ?", (node_id,))
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
-        
-        existing_links = json.loads(row[0]) if row[0] else []
-        
         # Entferne Link aus Liste
-        updated_links = [l for l in existing_links if l.get('url') != url]
+        removed = _json_array_remove_by_url(cursor, 'links', node_id, url)
         
-        if len(updated_links) == len(existing_links):
+        if removed is None:
+            raise HTTPException(status_code=404, detail=f"Node {node_id} nicht gefunden")
+        if not removed:
             raise HTTPException(status_code=404, detail="Link nicht gefunden")
         
-        # Update DB
-        cursor.execute(
-            "UPDATE nodes SET links = ? WHERE id = ?",
-            (json.dumps(updated_links), node_id)
-        )
         conn.commit()
-        conn.close()
+        invalidate_family_cache()
         
         return {"message": "Link erfolgreich gelöscht", "url": url}
         
@@ -5962,6 +6553,9 @@ async def delete_node_link(node_id: int, url: str):
             status_code=500,
             detail=f"Fehler beim Löschen: {str(e)}"
         )
+    
+    finally:
+        conn.close()
 
 
 # ============================================================
@@ -6127,8 +6721,9 @@ def get_product_successor(request: dict):
             return {"has_successor": False}
         
         # Find successors for any node in path (prioritize by severity)
-        placeholders = ','.join('?' * len(node_ids))
-        cursor.execute(f"""
+        # node_ids als EIN JSON-Parameter (json_each): SQL-Text unabhängig von der Anzahl,
+        # das Prepared Statement wird aus dem Statement-Cache wiederverwendet
+        cursor.execute("""
             SELECT 
                 ps.*,
                 source.code as source_code,
@@ -6140,18 +6735,12 @@ def get_product_successor(request: dict):
             FROM product_successors ps
             JOIN nodes source ON ps.source_node_id = source.id
             LEFT JOIN nodes target ON ps.target_node_id = target.id
-            WHERE ps.source_node_id IN ({placeholders})
+            WHERE ps.source_node_id IN (SELECT value FROM json_each(?))
               AND ps.show_warning = 1
               AND (ps.effective_date IS NULL OR ps.effective_date <= date('now'))
-            ORDER BY 
-                CASE ps.warning_severity 
-                    WHEN 'critical' THEN 1 
-                    WHEN 'warning' THEN 2 
-                    ELSE 3 
-                END,
-                ps.created_at DESC
+            ORDER BY ps.severity_rank, ps.created_at DESC
             LIMIT 1
-        """, node_ids)
+        """, (json.dumps(node_ids),))
         
         row = cursor.fetchone()
         
@@ -6196,81 +6785,80 @@ def get_all_successors(current_user: TokenData = Depends(get_current_user)):
     Get all successor relationships (Admin only).
     
     Returns list with enriched source/target information.
+    The JSON body is streamed in row blocks instead of building the full list.
     """
-    conn = get_db()
-    cursor = conn.cursor()
+    # Tuple rows: columns are selected in SUCCESSOR_LIST_FIELDS order
+    conn = get_db(row_factory=None)
     
     try:
-        cursor.execute("""
+        cursor = conn.execute("""
             SELECT 
-                ps.*,
+                ps.id,
+                ps.source_node_id,
                 source.code as source_code,
                 source.label as source_label,
                 source.full_typecode as source_typecode,
                 source.level as source_level,
-                source_family.code as source_family_code,
+                source.family_code as source_family_code,
+                ps.source_type,
+                ps.target_node_id,
                 target.code as target_code,
                 target.label as target_label,
                 target.full_typecode as target_typecode,
-                target.level as target_level
+                target.level as target_level,
+                ps.target_full_code,
+                -- ps.target_family_code belongs to target_full_code entries
+                target.family_code as target_family_code,
+                ps.replacement_type,
+                ps.migration_note,
+                ps.migration_note_en,
+                ps.effective_date,
+                ps.show_warning,
+                ps.allow_old_selection,
+                ps.warning_severity,
+                ps.created_at,
+                ps.created_by
             FROM product_successors ps
             JOIN nodes source ON ps.source_node_id = source.id
             LEFT JOIN nodes target ON ps.target_node_id = target.id
-            -- Get source family (root ancestor at level 0)
-            -- depth = level * 2 because of pattern containers between levels
-            LEFT JOIN node_paths sc_root ON sc_root.descendant_id = source.id AND sc_root.depth = source.level * 2
-            LEFT JOIN nodes source_family ON source_family.id = sc_root.ancestor_id AND source_family.level = 0
+            -- family_code is maintained by triggers (root family of each node)
             ORDER BY ps.created_at DESC
         """)
-        
-        rows = cursor.fetchall()
-        
-        results = []
-        for row in rows:
-            # Get target family code with separate query (subquery in SELECT doesn't work with LEFT JOIN)
-            target_family_code = None
-            if row['target_node_id'] and row['target_level'] is not None:
-                cursor.execute("""
-                    SELECT n.code FROM nodes n 
-                    JOIN node_paths np ON np.ancestor_id = n.id 
-                    WHERE np.descendant_id = ? 
-                      AND np.depth = ? 
-                      AND n.level = 0 
-                    LIMIT 1
-                """, (row['target_node_id'], row['target_level'] * 2))
-                family_result = cursor.fetchone()
-                if family_result:
-                    target_family_code = family_result['code']
-            
-            results.append({
-                "id": row['id'],
-                "source_node_id": row['source_node_id'],
-                "source_code": row['source_code'],
-                "source_label": row['source_label'],
-                "source_typecode": row['source_typecode'],
-                "source_level": row['source_level'],
-                "source_family_code": row['source_family_code'],
-                "source_type": row['source_type'],
-                "target_node_id": row['target_node_id'],
-                "target_code": row['target_code'],
-                "target_label": row['target_label'],
-                "target_typecode": row['target_typecode'],
-                "target_level": row['target_level'],
-                "target_full_code": row['target_full_code'],
-                "target_family_code": target_family_code,
-                "replacement_type": row['replacement_type'],
-                "migration_note": row['migration_note'],
-                "migration_note_en": row['migration_note_en'],
-                "effective_date": row['effective_date'],
-                "show_warning": bool(row['show_warning']),
-                "allow_old_selection": bool(row['allow_old_selection']),
-                "warning_severity": row['warning_severity'],
-                "created_at": row['created_at'],
-                "created_by": row['created_by'],
-            })
-        
-        return {"successors": results}
-        
+    except Exception:
+        conn.close()
+        raise
+    
+    # Connection wird vom Generator geschlossen, sobald der Body fertig ist
+    return StreamingResponse(_stream_successors_json(conn, cursor), media_type="application/json")
+
+
+# Feldnamen der Admin-Nachfolgerliste, in SELECT-Reihenfolge von get_all_successors
+SUCCESSOR_LIST_FIELDS = (
+    "id", "source_node_id", "source_code", "source_label", "source_typecode",
+    "source_level", "source_family_code", "source_type", "target_node_id",
+    "target_code", "target_label", "target_typecode", "target_level",
+    "target_full_code", "target_family_code", "replacement_type",
+    "migration_note", "migration_note_en", "effective_date", "show_warning",
+    "allow_old_selection", "warning_severity", "created_at", "created_by",
+)
+
+
+def _stream_successors_json(conn, cursor):
+    """Erzeugt {"successors": [...]} für get_all_successors stückweise als JSON-Bytes"""
+    try:
+        yield b'{"successors":['
+        separator = b''
+        # Blockweise, damit nicht jede Zeile einzeln über den Threadpool läuft
+        while rows := cursor.fetchmany(SUCCESSOR_STREAM_CHUNK_SIZE):
+            items = []
+            for row in rows:
+                item = dict(zip(SUCCESSOR_LIST_FIELDS, row))
+                item["show_warning"] = bool(item["show_warning"])
+                item["allow_old_selection"] = bool(item["allow_old_selection"])
+                items.append(encode_json_bytes(item))
+            yield separator + b','.join(items)
+            separator = b','
+        yield b']}'
     finally:
         conn.close()
 
@@ -6302,18 +6890,11 @@ def create_successor(
         # Validate target if target_node_id provided
         target_family_code = None
         if request.target_node_id:
+            # family_code is maintained by triggers (root family of the node)
             cursor.execute("""
-                SELECT n.id, n.code, n.full_typecode,
-                       family.code as family_code
-                FROM nodes n
-                LEFT JOIN nodes family ON (
-                    SELECT ancestor_id FROM node_paths 
-                    WHERE descendant_id = n.id AND depth = (
-                        SELECT MAX(depth) FROM node_paths WHERE descendant_id = n.id
-                    )
-                    LIMIT 1
-                ) = family.id
-                WHERE n.id = ?
+                SELECT id, code, full_typecode, family_code
+                FROM nodes
+                WHERE id = ?
             """, (request.target_node_id,))
             target = cursor.fetchone()
             if not target:
@@ -6361,6 +6942,68 @@ def create_successor(
         conn.close()
 
 
+# Legt Nachfolger für die (source_id, target_id)-Paare der CTE "pairs" in einem
+# Statement an; source_type wird per CASE aus dem Source-Node bestimmt
+# (intermediate / leaf / node). Bereits vorhandene Paare werden übersprungen:
+# das NOT EXISTS filtert sie vorab (sonst verbraucht jedes ignorierte Paar eine
+# AUTOINCREMENT-ID), OR IGNORE + idx_unique_successor sichert zusätzlich ab
+SUCCESSOR_BULK_INSERT_SQL = """
+    WITH pairs(source_id, target_id, source_order, target_order) AS (
+        {pairs_select}
+    )
+    INSERT OR IGNORE INTO product_successors (
+        source_node_id, source_type,
+        target_node_id, target_full_code, target_family_code,
+        replacement_type, migration_note, migration_note_en,
+        effective_date, show_warning, allow_old_selection,
+        warning_severity, created_by
+    )
+    SELECT
+        src.id,
+        CASE
+            WHEN src.full_typecode <> '' AND src.is_intermediate_code THEN 'intermediate'
+            WHEN src.full_typecode <> '' THEN 'leaf'
+            ELSE 'node'
+        END,
+        pairs.target_id,
+        NULL, NULL, 'successor', ?, NULL, NULL, 1, 1, ?, ?
+    FROM pairs
+    JOIN nodes src ON src.id = pairs.source_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM product_successors ps
+        WHERE ps.source_node_id = src.id
+          AND ps.target_node_id = pairs.target_id
+    )
+    ORDER BY pairs.source_order, pairs.target_order
+    RETURNING source_node_id, target_node_id
+"""
+
+# MODE 1: 1:1-Paare als JSON-Array [[source_id, target_id], ...]
+SUCCESSOR_LINKS_INSERT_SQL = SUCCESSOR_BULK_INSERT_SQL.format(pairs_select="""
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), key, 0
+        FROM json_each(?)
+""")
+
+# MODE 2: Kreuzprodukt zweier JSON-Arrays [source_id, ...] × [target_id, ...]
+SUCCESSOR_HINTS_INSERT_SQL = SUCCESSOR_BULK_INSERT_SQL.format(pairs_select="""
+        SELECT s.value, t.value, s.key, t.key
+        FROM json_each(?) AS s
+        CROSS JOIN json_each(?) AS t
+""")
+
+
+def _insert_successor_pairs(cursor, insert_sql: str, pair_params: tuple, migration_note: Optional[str],
+                            warning_severity: str, username: str) -> set:
+    """
+    Legt Nachfolger per SUCCESSOR_LINKS_INSERT_SQL / SUCCESSOR_HINTS_INSERT_SQL an.
+    
+    Gibt die tatsächlich angelegten (source_id, target_id)-Paare zurück;
+    Duplikate bestehender Verknüpfungen werden ohne Vorab-SELECT übersprungen.
+    """
+    cursor.execute(insert_sql, (*pair_params, migration_note, warning_severity, username))
+    return {(row[0], row[1]) for row in cursor.fetchall()}
+
+
 @app.post("/api/admin/successors/bulk", dependencies=[Depends(require_admin)])
 def create_successor_bulk(
     request: CreateSuccessorBulkRequest,
@@ -6382,19 +7025,20 @@ def create_successor_bulk(
     cursor = conn.cursor()
     
     try:
-        # 1. Fetch source nodes by IDs
         if not request.source_node_ids:
             raise HTTPException(status_code=400, detail="source_node_ids cannot be empty")
         
-        placeholders = ','.join('?' * len(request.source_node_ids))
-        cursor.execute(f"""
-            SELECT id, code, full_typecode, is_intermediate_code
+        # Fetch source and target nodes in one query, then split by request IDs
+        cursor.execute("""
+            SELECT id, code, full_typecode
             FROM nodes
-            WHERE id IN ({placeholders})
-            ORDER BY id
-        """, request.source_node_ids)
+            WHERE id IN (SELECT value FROM json_each(?))
+        """, (json.dumps([*request.source_node_ids, *request.target_node_ids]),))
         
-        source_nodes = cursor.fetchall()
+        nodes_by_id = {node['id']: node for node in cursor.fetchall()}
+        
+        # 1. Source nodes (sorted by ID, each node once)
+        source_nodes = [nodes_by_id[i] for i in sorted(set(request.source_node_ids)) if i in nodes_by_id]
         
         if not source_nodes:
             raise HTTPException(status_code=404, detail="No source nodes found with provided IDs")
@@ -6405,19 +7049,11 @@ def create_successor_bulk(
                 detail=f"Some source node IDs not found ({len(source_nodes)} found, {len(request.source_node_ids)} requested)"
             )
         
-        # 2. Fetch target nodes by IDs
+        # 2. Target nodes (sorted by ID, each node once)
         if not request.target_node_ids:
             raise HTTPException(status_code=400, detail="target_node_ids cannot be empty")
         
-        placeholders = ','.join('?' * len(request.target_node_ids))
-        cursor.execute(f"""
-            SELECT id, code, full_typecode, is_intermediate_code
-            FROM nodes
-            WHERE id IN ({placeholders})
-            ORDER BY id
-        """, request.target_node_ids)
-        
-        target_nodes = cursor.fetchall()
+        target_nodes = [nodes_by_id[i] for i in sorted(set(request.target_node_ids)) if i in nodes_by_id]
         
         if not target_nodes:
             raise HTTPException(status_code=404, detail="No target nodes found with provided IDs")
@@ -6428,6 +7064,9 @@ def create_successor_bulk(
                 detail=f"Some target node IDs not found ({len(target_nodes)} found, {len(request.target_node_ids)} requested)"
             )
         
+        # Inserts in einer IMMEDIATE-Transaktion (ein Commit/fsync)
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # 3. Automatic mode detection: Links vs Hint
         source_all_complete = all(node['full_typecode'] for node in source_nodes)
         target_all_complete = all(node['full_typecode'] for node in target_nodes)
@@ -6436,54 +7075,28 @@ def create_successor_bulk(
         if (source_all_complete and target_all_complete and 
             len(source_nodes) == len(target_nodes)):
             # MODE 1: Create individual 1:1 links (bulk)
-            created_successors = []
-            skipped_duplicates = 0
+            node_pairs = list(zip(source_nodes, target_nodes))
             
-            for source_node, target_node in zip(source_nodes, target_nodes):
-                # Check if this link already exists
-                cursor.execute("""
-                    SELECT id FROM product_successors
-                    WHERE source_node_id = ? AND target_node_id = ?
-                """, (source_node['id'], target_node['id']))
-                
-                if cursor.fetchone():
-                    # Skip duplicate
-                    skipped_duplicates += 1
-                    continue
-                
-                # Automatically determine source_type
-                if source_node['full_typecode'] and source_node['is_intermediate_code']:
-                    source_type = 'intermediate'
-                elif source_node['full_typecode']:
-                    source_type = 'leaf'
-                else:
-                    source_type = 'node'
-                
-                # Insert successor with hard-coded settings
-                cursor.execute("""
-                    INSERT INTO product_successors (
-                        source_node_id, source_type,
-                        target_node_id, target_full_code, target_family_code,
-                        replacement_type, migration_note, migration_note_en,
-                        effective_date, show_warning, allow_old_selection,
-                        warning_severity, created_by
-                    ) VALUES (?, ?, ?, NULL, NULL, 'successor', ?, NULL, NULL, 1, 1, 'warning', ?)
-                """, (
-                    source_node['id'],
-                    source_type,
-                    target_node['id'],
-                    request.migration_note,
-                    current_user.username
-                ))
-                
-                created_successors.append({
+            # Insert successors with hard-coded settings; existing links are skipped
+            inserted = _insert_successor_pairs(
+                cursor, SUCCESSOR_LINKS_INSERT_SQL,
+                (json.dumps([(source_node['id'], target_node['id']) for source_node, target_node in node_pairs]),),
+                request.migration_note, 'warning', current_user.username
+            )
+            
+            conn.commit()
+            
+            created_successors = [
+                {
                     "source_node_id": source_node['id'],
                     "source_code": source_node['code'],
                     "target_node_id": target_node['id'],
                     "target_code": target_node['code'],
-                })
-            
-            conn.commit()
+                }
+                for source_node, target_node in node_pairs
+                if (source_node['id'], target_node['id']) in inserted
+            ]
+            skipped_duplicates = len(node_pairs) - len(inserted)
             
             return {
                 "type": "links",
@@ -6498,73 +7111,44 @@ def create_successor_bulk(
             # This covers cases like: BCC Level 2 "020" (multiple nodes) → BCC Level 2 "007" (multiple nodes)
             # Each "020" node gets a hint to each "007" node
             
-            created_hints = []
-            updated_hints = 0
-            skipped_duplicates = 0
-            
             # Create migration note with count info
             auto_note = f"Allgemeine Referenz: {len(source_nodes)} Source-Node(s) → {len(target_nodes)} Target-Node(s)"
             final_note = f"{request.migration_note}. {auto_note}" if request.migration_note else auto_note
             
             # For each source node, create hints to ALL target nodes
-            for source_node in source_nodes:
-                for target_node in target_nodes:
-                    # Check if a hint already exists for this combination
-                    cursor.execute("""
-                        SELECT id FROM product_successors
-                        WHERE source_node_id = ? AND target_node_id = ?
-                    """, (source_node['id'], target_node['id']))
-                    
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Skip or update existing hint
-                        skipped_duplicates += 1
-                        continue
-                    
-                    # Determine source_type for the hint
-                    if source_node['full_typecode'] and source_node['is_intermediate_code']:
-                        source_type = 'intermediate'
-                    elif source_node['full_typecode']:
-                        source_type = 'leaf'
-                    else:
-                        source_type = 'node'  # General node-level hint (use 'node' instead of 'reference')
-                    
-                    # Insert hint entry
-                    cursor.execute("""
-                        INSERT INTO product_successors (
-                            source_node_id, source_type,
-                            target_node_id, target_full_code, target_family_code,
-                            replacement_type, migration_note, migration_note_en,
-                            effective_date, show_warning, allow_old_selection,
-                            warning_severity, created_by
-                        ) VALUES (?, ?, ?, NULL, NULL, 'successor', ?, NULL, NULL, 1, 1, 'info', ?)
-                    """, (
-                        source_node['id'],
-                        source_type,
-                        target_node['id'],
-                        final_note,
-                        current_user.username
-                    ))
-                    
-                    created_hints.append({
-                        "source_node_id": source_node['id'],
-                        "source_code": source_node['code'],
-                        "target_node_id": target_node['id'],
-                        "target_code": target_node['code'],
-                    })
+            # (cross product is built by SQLite; existing combinations are skipped)
+            inserted = _insert_successor_pairs(
+                cursor, SUCCESSOR_HINTS_INSERT_SQL,
+                (json.dumps([node['id'] for node in source_nodes]),
+                 json.dumps([node['id'] for node in target_nodes])),
+                final_note, 'info', current_user.username
+            )
             
             conn.commit()
             
+            # Only the first 10 created hints are returned (response size)
+            created_hints = list(islice((
+                {
+                    "source_node_id": source_node['id'],
+                    "source_code": source_node['code'],
+                    "target_node_id": target_node['id'],
+                    "target_code": target_node['code'],
+                }
+                for source_node in source_nodes
+                for target_node in target_nodes
+                if (source_node['id'], target_node['id']) in inserted
+            ), 10))
+            skipped_duplicates = len(source_nodes) * len(target_nodes) - len(inserted)
+            
             return {
                 "type": "hint",
-                "message": f"Created {len(created_hints)} reference hints ({len(source_nodes)} source × {len(target_nodes)} target nodes)" + 
+                "message": f"Created {len(inserted)} reference hints ({len(source_nodes)} source × {len(target_nodes)} target nodes)" + 
                           (f", skipped {skipped_duplicates} duplicates" if skipped_duplicates > 0 else ""),
-                "created_count": len(created_hints),
+                "created_count": len(inserted),
                 "skipped_count": skipped_duplicates,
                 "source_count": len(source_nodes),
                 "target_count": len(target_nodes),
-                "successors": created_hints[:10]  # Return max 10 for response size
+                "successors": created_hints
             }
         
     except HTTPException:
@@ -6589,11 +7173,6 @@ def update_successor(
     cursor = conn.cursor()
     
     try:
-        # Check if exists
-        cursor.execute("SELECT id FROM product_successors WHERE id = ?", (successor_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Successor not found")
-        
         # Build update query dynamically
         updates = []
         params = []
@@ -6621,12 +7200,19 @@ def update_successor(
             params.append(request.warning_severity)
         
         if not updates:
+            # Unbekannte ID hat Vorrang vor leerem Request
+            cursor.execute("SELECT id FROM product_successors WHERE id = ?", (successor_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Successor not found")
             raise HTTPException(status_code=400, detail="No fields to update")
         
         params.append(successor_id)
         query = f"UPDATE product_successors SET {', '.join(updates)} WHERE id = ?"
         
         cursor.execute(query, params)
+        # Keine Zeile getroffen: nichts geschrieben, close() verwirft die Transaktion
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Successor not found")
         conn.commit()
         
         return {"message": "Successor updated successfully"}
@@ -6652,11 +7238,9 @@ def delete_successor(
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT id FROM product_successors WHERE id = ?", (successor_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Successor not found")
-        
         cursor.execute("DELETE FROM product_successors WHERE id = ?", (successor_id,))
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Successor not found")
         conn.commit()
         
         return {"message": "Successor deleted successfully"}
@@ -6910,6 +7494,7 @@ def update_segment_name(
         
         updated_count = cursor.rowcount
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -7092,6 +7677,7 @@ def create_or_update_subsegments(
             message = f"Sub-Segment-Definition erstellt (ID {subseg_id})"
         
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -7123,6 +7709,7 @@ def delete_subsegments(
         # Delete
         cursor.execute("DELETE FROM segment_subsegments WHERE id = ?", (subsegment_id,))
         conn.commit()
+        invalidate_family_cache()
         
         return {
             "success": True,
@@ -7170,6 +7757,22 @@ def get_family_schema_visualization(family_code: str):
       - Ignoriere Typecodes ohne group_name
     - Wenn Produktfamilie KEINE group_names hat UND max 5 einzigartige Schemas:
       - Zeige alle Schemas der gesamten Familie
+    
+    Das Ergebnis wird pro Familie gecacht (siehe _build_family_schema_visualization).
+    """
+    result = _build_family_schema_visualization(family_code)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Familie '{family_code}' nicht gefunden")
+    return result
+
+
+@db_cache(maxsize=256)
+def _build_family_schema_visualization(family_code: str) -> Optional[FamilySchemaVisualization]:
+    """
+    Berechnet die Schema-Visualisierung einer Familie (None falls nicht gefunden).
+    
+    Schreibende Endpoints für Nodes/Sub-Segmente rufen invalidate_family_cache()
+    auf; Änderungen anderer Prozesse (import_subsegments.py) erkennt db_cache.
     """
     conn = get_db()
     cursor = conn.cursor()
@@ -7184,7 +7787,7 @@ def get_family_schema_visualization(family_code: str):
         
         family = cursor.fetchone()
         if not family:
-            raise HTTPException(status_code=404, detail=f"Familie '{family_code}' nicht gefunden")
+            return None
         
         family_id = family['id']
         code = family['code']
@@ -7192,31 +7795,37 @@ def get_family_schema_visualization(family_code: str):
         label_en = family['label_en']
         
         # Prüfe ob diese Familie group_names hat (alle Descendants dieser Familie)
+        # EXISTS bricht beim ersten Treffer ab (kein DISTINCT über alle Descendants)
         cursor.execute("""
-            SELECT COUNT(DISTINCT n.group_name)
-            FROM nodes n
-            JOIN node_paths p ON p.descendant_id = n.id
-            WHERE p.ancestor_id = ? AND n.group_name IS NOT NULL
+            SELECT EXISTS(
+                SELECT 1
+                FROM nodes n
+                JOIN node_paths p ON p.descendant_id = n.id
+                WHERE p.ancestor_id = ? AND n.group_name IS NOT NULL
+            )
         """, (family_id,))
         
-        has_group_names = cursor.fetchone()[0] > 0
+        has_group_names = bool(cursor.fetchone()[0])
         
         groups = []
         
         if has_group_names:
             # Fall 1: Familie hat group_names - gruppiere nach group_name
+            # Alle Nodes mit full_typecode (nicht nur Leaves!) in einer Abfrage,
+            # danach pro group_name partitioniert
             cursor.execute("""
-                SELECT DISTINCT n.group_name
+                SELECT n.group_name, n.id, n.full_typecode
                 FROM nodes n
                 JOIN node_paths p ON p.descendant_id = n.id
-                WHERE p.ancestor_id = ? AND n.group_name IS NOT NULL
-                ORDER BY n.group_name
+                WHERE p.ancestor_id = ?
+                  AND n.group_name IS NOT NULL
+                  AND n.full_typecode IS NOT NULL
+                ORDER BY n.group_name, p.descendant_id
             """, (family_id,))
             
-            group_names = [row[0] for row in cursor.fetchall()]
-            
-            for group_name in group_names:
-                patterns = _analyze_schemas_for_group(cursor, family_id, code, group_name)
+            for group_name, group_rows in groupby(cursor.fetchall(), key=lambda row: row[0]):
+                nodes = [(row[1], row[2]) for row in group_rows]
+                patterns = _extract_patterns_from_nodes(cursor, family_id, nodes, code, group_name)
                 if patterns:  # Nur hinzufügen wenn Patterns gefunden
                     groups.append(GroupSchema(
                         group_name=group_name,
@@ -7246,30 +7855,12 @@ def get_family_schema_visualization(family_code: str):
         conn.close()
 
 
-def _analyze_schemas_for_group(cursor, family_id: int, family_code: str, group_name: str) -> List[SchemaPattern]:
-    """Analysiert Schema-Muster für eine bestimmte group_name"""
-    
-    # Hole alle Nodes mit full_typecode dieser group_name (nicht nur Leaves!)
-    cursor.execute("""
-        SELECT n.id, n.code, n.full_typecode, n.name
-        FROM nodes n
-        JOIN node_paths p ON p.descendant_id = n.id
-        WHERE p.ancestor_id = ?
-          AND n.group_name = ?
-          AND n.full_typecode IS NOT NULL
-    """, (family_id, group_name))
-    
-    nodes = cursor.fetchall()
-    
-    return _extract_patterns_from_nodes(cursor, family_id, nodes, family_code, group_name)
-
-
 def _analyze_schemas_for_family(cursor, family_id: int, family_code: str) -> List[SchemaPattern]:
     """Analysiert Schema-Muster für die gesamte Familie (ohne group_name Filter)"""
     
     # Hole alle Nodes mit full_typecode der Familie (nicht nur Leaves!)
     cursor.execute("""
-        SELECT n.id, n.code, n.full_typecode, n.name
+        SELECT n.id, n.full_typecode
         FROM nodes n
         JOIN node_paths p ON p.descendant_id = n.id
         WHERE p.ancestor_id = ?
@@ -7282,13 +7873,13 @@ def _analyze_schemas_for_family(cursor, family_id: int, family_code: str) -> Lis
 
 
 def _extract_patterns_from_nodes(cursor, family_id: int, nodes, family_code: str, group_name: Optional[str] = None) -> List[SchemaPattern]:
-    """Extrahiert einzigartige Schema-Muster aus einer Liste von Nodes"""
+    """Extrahiert einzigartige Schema-Muster aus einer Liste von (id, full_typecode) Zeilen"""
     
     # Sammle Muster
     pattern_examples = {}  # pattern_string -> (example_code, segments, node_id)
     pattern_counts = {}  # pattern_string -> count
     
-    for node_id, code, full_typecode, name in nodes:
+    for node_id, full_typecode in nodes:
         if not full_typecode:
             continue
         
@@ -7315,14 +7906,17 @@ def _extract_patterns_from_nodes(cursor, family_id: int, nodes, family_code: str
         if pattern_string not in pattern_examples:
             pattern_examples[pattern_string] = (full_typecode, segments, node_id)
     
+    # Hole Segment-Namen für alle Beispiel-Typcodes in einer Abfrage
+    names_by_node = _get_segment_names(cursor, {
+        node_id: len(segments) for _code, segments, node_id in pattern_examples.values()
+    })
+    
     # Erstelle SchemaPattern Objekte
     result = []
     for pattern_string in sorted(pattern_examples.keys()):
         example_code, segments, node_id = pattern_examples[pattern_string]
         pattern = [int(x) for x in pattern_string.split('-')]
-        
-        # Hole Segment-Namen für diesen Typcode
-        segment_names = _get_segment_names(cursor, family_id, node_id, len(segments))
+        segment_names = names_by_node[node_id]
         
         # Hole Sub-Segmente für jedes Level
         segment_subsegments = []
@@ -7367,41 +7961,41 @@ def _get_subsegments_for_level(cursor, family_code: str, group_name: str, level:
     return None
 
 
-def _get_segment_names(cursor, family_id: int, node_id: int, num_segments: int) -> List[Optional[str]]:
+def _get_segment_names(cursor, segment_counts: Dict[int, int]) -> Dict[int, List[Optional[str]]]:
     """
-    Holt die Namen der Code-Segmente für einen bestimmten Node.
-    Folgt dem Pfad von Familie bis zum Node und sammelt die Namen.
+    Holt die Namen der Code-Segmente für mehrere Nodes (node_id -> Anzahl Segmente).
+    Folgt jeweils dem Pfad von Familie bis zum Node und sammelt die Namen.
     Jedes Segment entspricht einem Level (0 = Familie, 1 = erster Code, etc.)
     """
+    level_names = {node_id: {} for node_id in segment_counts}
     
-    # Hole den vollständigen Pfad zu diesem Node, sortiert nach Level
-    cursor.execute("""
-        SELECT n.level, n.name, n.code
-        FROM node_paths p
-        JOIN nodes n ON p.ancestor_id = n.id
-        WHERE p.descendant_id = ?
-        ORDER BY n.level ASC
-    """, (node_id,))
-    
-    path_nodes = cursor.fetchall()
-    
-    # Erstelle Dict: level -> name
-    level_names = {}
-    for row in path_nodes:
-        level = row[0]
-        name = row[1]
-        level_names[level] = name if name else None
+    if segment_counts:
+        # Hole die Pfade aller Nodes, sortiert nach Level.
+        # Bei mehreren Ancestors auf einem Level (Pattern-Container) gewinnt der
+        # oberste (größte depth), daher innerhalb des Levels nach depth sortiert
+        placeholders = ','.join('?' * len(segment_counts))
+        cursor.execute(f"""
+            SELECT p.descendant_id, n.level, n.name
+            FROM node_paths p
+            JOIN nodes n ON p.ancestor_id = n.id
+            WHERE p.descendant_id IN ({placeholders})
+            ORDER BY p.descendant_id, n.level ASC, p.depth ASC
+        """, list(segment_counts))
+        
+        # level -> name pro Node (letzter Eintrag pro Level gewinnt)
+        for node_id, level, name in cursor.fetchall():
+            level_names[node_id][level] = name if name else None
     
     # Baue Liste der Namen für jedes Segment
     # Segment 0 = Familie (Level 0), Segment 1 = Level 1, etc.
-    names = []
-    for i in range(num_segments):
-        names.append(level_names.get(i, None))
-    
-    return names
+    return {
+        node_id: [level_names[node_id].get(i) for i in range(num_segments)]
+        for node_id, num_segments in segment_counts.items()
+    }
 
 
-def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: Optional[str]):
+def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: Optional[str],
+                      node_code: Optional[str] = None):
     """
     Synchronisiert node_labels Tabelle basierend auf label/label_en Strings.
     
@@ -7418,6 +8012,8 @@ def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: O
       - position_start/position_end (Position im Node-Code)
       - label_de/label_en
       - display_order
+    
+    node_code: Optional bereits bekannter Node-Code (spart die Abfrage bei Bulk-Updates)
     """
     from label_parser import parse_structured_label
     
@@ -7428,12 +8024,14 @@ def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: O
     if not label_de and not label_en:
         return  # Keine Labels vorhanden
     
-    # Hole Node-Code für Positions-Berechnung
-    node_code = cursor.execute(
-        "SELECT code FROM nodes WHERE id = ?",
-        (node_id,)
-    ).fetchone()
-    full_code = node_code['code'] if node_code else None
+    # Hole Node-Code für Positions-Berechnung (falls nicht übergeben)
+    if node_code is None:
+        node_row = cursor.execute(
+            "SELECT code FROM nodes WHERE id = ?",
+            (node_id,)
+        ).fetchone()
+        node_code = node_row['code'] if node_row else None
+    full_code = node_code
     
     # Parse beide Labels mit dem label_parser Modul
     de_parsed = parse_structured_label(label_de, full_code) if label_de else []
@@ -7483,14 +8081,14 @@ def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: O
                 'display_order': entry.get('display_order', 0)
             }
     
-    # Insert all merged entries
-    for data in sorted(merged.values(), key=lambda x: x['display_order']):
-        cursor.execute("""
-            INSERT INTO node_labels 
-            (node_id, title, code_segment, position_start, position_end, 
-             label_de, label_en, display_order)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    # Insert all merged entries (ein vorbereitetes Statement für alle Zeilen)
+    cursor.executemany("""
+        INSERT INTO node_labels 
+        (node_id, title, code_segment, position_start, position_end, 
+         label_de, label_en, display_order)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (
             node_id,
             data['title'],
             data['code_segment'],
@@ -7499,7 +8097,9 @@ def _sync_node_labels(cursor, node_id: int, label_de: Optional[str], label_en: O
             data['label_de'],
             data['label_en'],
             data['display_order']
-        ))
+        )
+        for data in sorted(merged.values(), key=lambda x: x['display_order'])
+    ])
 
 
 # ============================================================
@@ -829,6 +829,7 @@ export interface BulkFilterRequest {
     to?: number;
     allowed: 'alphabetic' | 'numeric' | 'alphanumeric';
   };
+  strict?: boolean;  // Nur kompatible Nodes liefern (Code-Filter serverseitig in SQL)
 }
 
 export interface BulkFilterResponse {
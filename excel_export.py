@@ -10,6 +10,8 @@ Exportiert Produktfamilien mit:
 import tempfile
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
+from itertools import groupby
 from typing import List, Dict
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
@@ -20,29 +22,24 @@ from openpyxl.utils import get_column_letter
 # Helper: Pattern Berechnung
 # ============================================================
 
+@lru_cache(maxsize=None)
 def _compute_pattern_string(full_typecode: str) -> str:
     """
     Berechnet Pattern aus full_typecode.
     Beispiel: "BCC M313-0000-20" -> "3-4-4-2"
+    
+    Gecacht: viele Nodes einer Familie teilen sich dasselbe Schema.
     """
     if not full_typecode:
         return ""
     
-    parts = full_typecode.split('-')
-    pattern_parts = []
-    
-    for part in parts:
-        if ' ' in part:
-            # Split bei Leerzeichen
-            subparts = part.split()
-            for subpart in subparts:
-                if subpart.strip():
-                    pattern_parts.append(str(len(subpart.strip())))
-        else:
-            if part.strip():
-                pattern_parts.append(str(len(part.strip())))
-    
-    return '-'.join(pattern_parts)
+    # Split bei '-', Teile mit Leerzeichen zusätzlich bei Whitespace
+    segments = (
+        subpart.strip()
+        for part in full_typecode.split('-')
+        for subpart in (part.split() if ' ' in part else (part,))
+    )
+    return '-'.join(str(len(segment)) for segment in segments if segment)
 
 
 # ============================================================
@@ -86,34 +83,16 @@ def _analyze_shared_codes(cursor, family_id: int, groups: List[dict]) -> dict:
         
         # Für Level 1, 2, 3... (nicht Level 0 = Familie)
         for level in range(1, max_level + 1):
-            # Hole DISTINCT Codes die zur Familie gehören UND zu dieser Gruppe führen
+            # Ein Query pro (Level, Gruppe): DISTINCT Codes der Familie, die zu dieser
+            # Gruppe führen, je Code EIN Beispiel-Node (kleinste ID) inkl. seiner Labels
             cursor.execute("""
-                SELECT DISTINCT n.code
-                FROM nodes n
-                JOIN node_paths p1 ON p1.descendant_id = n.id
-                WHERE p1.ancestor_id = ?
-                AND n.level = ?
-                AND n.code IS NOT NULL
-                AND EXISTS (
-                    SELECT 1
-                    FROM nodes descendant
-                    JOIN node_paths p2 ON p2.descendant_id = descendant.id
-                    WHERE p2.ancestor_id = n.id
-                    AND descendant.group_name = ?
-                )
-            """, (family_id, level, gname))
-            
-            for row in cursor.fetchall():
-                code = row['code']
-                
-                # Hole EINEN Beispiel-Node für Attribute
-                cursor.execute("""
-                    SELECT n.id, n.name
+                WITH samples AS (
+                    SELECT n.code, MIN(n.id) AS id, n.name
                     FROM nodes n
                     JOIN node_paths p1 ON p1.descendant_id = n.id
                     WHERE p1.ancestor_id = ?
-                    AND n.code = ? 
                     AND n.level = ?
+                    AND n.code IS NOT NULL
                     AND EXISTS (
                         SELECT 1
                         FROM nodes descendant
@@ -121,25 +100,19 @@ def _analyze_shared_codes(cursor, family_id: int, groups: List[dict]) -> dict:
                         WHERE p2.ancestor_id = n.id
                         AND descendant.group_name = ?
                     )
-                    LIMIT 1
-                """, (family_id, code, level, gname))
-                
-                node = cursor.fetchone()
-                if not node:
-                    continue
-                
-                # Get labels
-                cursor.execute("""
-                    SELECT label_de, label_en
-                    FROM node_labels
-                    WHERE node_id = ?
-                    ORDER BY display_order
-                """, (node['id'],))
-                
-                labels = cursor.fetchall()
+                    GROUP BY n.code
+                )
+                SELECT s.code, s.name, l.label_de, l.label_en
+                FROM samples s
+                LEFT JOIN node_labels l ON l.node_id = s.id
+                ORDER BY s.code, l.display_order, l.id
+            """, (family_id, level, gname))
+            
+            for code, rows in groupby(cursor.fetchall(), key=lambda r: r['code']):
+                labels = list(rows)
                 label_de = '\n\n'.join([l['label_de'] for l in labels if l['label_de']])
                 label_en = '\n\n'.join([l['label_en'] for l in labels if l['label_en']])
-                name = node['name'] or ''
+                name = labels[0]['name'] or ''
                 
                 level_codes[level].add((code, name, label_de, label_en, gname))
     
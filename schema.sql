@@ -41,11 +41,14 @@ CREATE TABLE IF NOT EXISTS nodes (
     -- Grouping
     group_name TEXT,  -- Cross-branch grouping (e.g., "Performance", "Standard")
     
+    -- Denormalized root family code (maintained by triggers below)
+    family_code TEXT,
+    
     -- Pictures (JSON array with image metadata)
-    pictures TEXT DEFAULT '[]',  -- JSON: [{"url": "...", "description": "...", "uploaded_at": "..."}]
+    pictures TEXT NOT NULL DEFAULT '[]',  -- JSON: [{"url": "...", "description": "...", "uploaded_at": "..."}]
     
     -- Links (JSON array with external links)
-    links TEXT DEFAULT '[]',  -- JSON: [{"url": "...", "title": "...", "description": "...", "added_at": "..."}]
+    links TEXT NOT NULL DEFAULT '[]',  -- JSON: [{"url": "...", "title": "...", "description": "...", "added_at": "..."}]
     
     -- Metadata
     FOREIGN KEY (parent_id) REFERENCES nodes(id) ON DELETE CASCADE,
@@ -74,7 +77,12 @@ CREATE INDEX IF NOT EXISTS idx_nodes_typecode ON nodes(full_typecode) WHERE full
 -- For Query 4: Get nodes at specific level
 CREATE INDEX IF NOT EXISTS idx_nodes_level ON nodes(level);
 
+-- Family lookup without closure table join (e.g. successor admin list)
+CREATE INDEX IF NOT EXISTS idx_nodes_family_code ON nodes(family_code);
+
 -- Composite index for performance
+-- Also covers "WHERE code = ? AND level = ?" (delete_node / delete-preview):
+-- the rowid (id) is part of every index entry, so no extra nodes(code, level, id) index is needed
 CREATE INDEX IF NOT EXISTS idx_nodes_level_code ON nodes(level, code) WHERE code IS NOT NULL;
 
 
@@ -175,9 +183,16 @@ CREATE TABLE IF NOT EXISTS node_paths (
 -- INDEXES for node_paths
 -- ============================================================================
 
+-- ancestor_id -> descendant_id lookups use the primary key (covering)
+-- "ancestor_id = ? AND depth > 0" also scans the PK range; the only row the
+-- depth filter drops is the self-link, so no (ancestor_id, depth) index needed
+
 -- For backward compatibility checks (Query 4)
 CREATE INDEX IF NOT EXISTS idx_paths_descendant ON node_paths(descendant_id);
 
+-- For path lookups by descendant (+ depth), covering: no table fetch for ancestor_id
+CREATE INDEX IF NOT EXISTS idx_paths_descendant_cover ON node_paths(descendant_id, depth, ancestor_id);
+
 -- For depth-based queries
 CREATE INDEX IF NOT EXISTS idx_paths_depth ON node_paths(depth);
 
@@ -216,6 +231,31 @@ BEGIN
     WHERE ancestor_id = OLD.id OR descendant_id = OLD.id;
 END;
 
+-- Trigger: Inherit family_code from parent (root: own code)
+CREATE TRIGGER IF NOT EXISTS trg_node_family_code
+AFTER INSERT ON nodes
+FOR EACH ROW
+BEGIN
+    UPDATE nodes
+    SET family_code = CASE
+        WHEN NEW.parent_id IS NULL THEN NEW.code
+        ELSE (SELECT family_code FROM nodes WHERE id = NEW.parent_id)
+    END
+    WHERE id = NEW.id;
+END;
+
+-- Trigger: Propagate a renamed family code to all descendants
+CREATE TRIGGER IF NOT EXISTS trg_family_code_rename
+AFTER UPDATE OF code ON nodes
+FOR EACH ROW
+WHEN NEW.parent_id IS NULL AND NEW.code IS NOT OLD.code
+BEGIN
+    UPDATE nodes
+    SET family_code = NEW.code
+    WHERE id = NEW.id
+       OR id IN (SELECT descendant_id FROM node_paths WHERE ancestor_id = NEW.id);
+END;
+
 
 -- ============================================================================
 -- VIEWS (Helper views for common queries)
@@ -318,6 +358,10 @@ CREATE TABLE IF NOT EXISTS product_successors (
     show_warning BOOLEAN DEFAULT 1,  -- Show warning to users
     allow_old_selection BOOLEAN DEFAULT 1,  -- Can users still select old product?
     warning_severity TEXT DEFAULT 'info' CHECK(warning_severity IN ('info', 'warning', 'critical')),
+    -- Sort key for warnings (critical first), used instead of a CASE in ORDER BY
+    severity_rank INTEGER GENERATED ALWAYS AS (
+        CASE warning_severity WHEN 'critical' THEN 1 WHEN 'warning' THEN 2 ELSE 3 END
+    ) VIRTUAL,
     
     -- Audit
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -341,6 +385,16 @@ CREATE TABLE IF NOT EXISTS product_successors (
 -- For finding successors of a specific node
 CREATE INDEX IF NOT EXISTS idx_successors_source ON product_successors(source_node_id);
 
+-- Active warnings of a node in display order (get_node_successor: LIMIT 1 without sort)
+CREATE INDEX IF NOT EXISTS idx_successors_active_source
+ON product_successors(source_node_id, warning_severity DESC, created_at DESC)
+WHERE show_warning = 1;
+
+-- Active warnings of a set of nodes by severity (get_product_successor)
+CREATE INDEX IF NOT EXISTS idx_successors_active_rank
+ON product_successors(source_node_id, severity_rank, created_at DESC)
+WHERE show_warning = 1;
+
 -- For finding what products point to a specific target
 CREATE INDEX IF NOT EXISTS idx_successors_target ON product_successors(target_node_id) WHERE target_node_id IS NOT NULL;
 